@@ -1,25 +1,280 @@
-from flask import Flask, render_template, jsonify
+from flask import Blueprint, Flask, current_app, render_template, jsonify, request, Response
 from dotenv import load_dotenv
+import hashlib
 import os
-import json
+
+from dataset import DatasetCache
+from ingredient_index import CooccurrenceIndex, GraphIndex, IngredientIndex, InvalidCursor, heatmap, parse_fields
+from metrics import RequestMetrics
+from mmap_index import MmapIndexCache
+
+# Upper bound on page sizes for the query endpoints
+MAX_LIMIT = 500
+
+# Upper bound on the heatmap size, which grows as k^2
+MAX_HEATMAP_K = 100
+
+# Default and upper bound on the links in a graph response, so the client
+# only simulates a few hundred nodes
+DEFAULT_GRAPH_LINKS = 300
+MAX_GRAPH_LINKS = 2000
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
+views = Blueprint('views', __name__)
+
+class DataFiles:
+    """
+    The processed data files an app serves, each behind its own cache.
+
+    Files are parsed once per process and, with `auto_reload`, reloaded
+    when they change on disk. `preload()` loads everything up front, so a
+    server that forks workers afterwards shares the parsed data with them.
+    """
+
+    def __init__(self, data_dir, auto_reload=True):
+        self.auto_reload = auto_reload
+        def path(name):
+            return os.path.join(data_dir, name)
+        self.recipes = DatasetCache(path('processed_ingredients.json'), auto_reload=auto_reload)
+        # Ingredient queries use the mmap index from scripts/build_index.py, shared by all
+        # worker processes through the page cache; without a usable one the JSON is indexed in memory
+        self.index = MmapIndexCache(path('ingredients.idx'), auto_reload=auto_reload)
+        self.fallback_index = DatasetCache(path('processed_ingredients.json'), index_factory=IngredientIndex,
+                                           auto_reload=auto_reload)
+        # The index snapshot last compared with its JSON, and whether it matched
+        self._index_checked = None
+        self.compact = DatasetCache(path('processed_ingredients.compact.json'), auto_reload=auto_reload)
+        self.cooccurrence = DatasetCache(path('cooccurrence.json'), index_factory=CooccurrenceIndex,
+                                         auto_reload=auto_reload)
+        self.graph = DatasetCache(path('recipe_graph.json'), index_factory=GraphIndex, auto_reload=auto_reload)
+
+    def current_index(self):
+        """
+        The mmap index snapshot, or None if it is missing, in an older
+        format, or was built from another version of the JSON.
+
+        Without auto_reload the JSON is compared once per index snapshot
+        (and on preload) rather than on every request.
+        """
+        try:
+            snapshot = self.index.get()
+        except (FileNotFoundError, ValueError):
+            return None
+        checked = self._index_checked
+        if self.auto_reload or checked is None or checked[0] is not snapshot:
+            checked = self._index_checked = (snapshot, not self.index.source_changed(snapshot))
+        return snapshot if checked[1] else None
+
+    def ingredient_index(self):
+        """Snapshot backing the ingredient queries"""
+        snapshot = self.current_index()
+        return snapshot if snapshot is not None else self.fallback_index.get()
+
+    def served(self):
+        """Caches backing the endpoints; the in-memory index only when the mmap index can't be used"""
+        caches = [self.recipes, self.compact, self.cooccurrence, self.graph]
+        caches.append(self.index if self.current_index() is not None else self.fallback_index)
+        return caches
+
+    def preload(self):
+        """
+        Load (or reload, if changed) every data file that exists; returns the paths loaded.
+
+        The bodies served as-is are compressed here too, so forked workers
+        share them instead of each compressing on its first request.
+        """
+        # Reload the index first, so it is checked against the JSON as now on disk
+        self._index_checked = None
+        try:
+            self.index.reload()
+        except (FileNotFoundError, ValueError):
+            pass
+        loaded = []
+        for cache in self.served():
+            try:
+                dataset = cache.reload()
+            except FileNotFoundError:
+                continue
+            if cache in (self.recipes, self.compact):
+                dataset.precompress()
+            loaded.append(cache.path)
+        return loaded
+
+    def changed(self):
+        """Whether any served data file changed since it was loaded"""
+        return any(cache.changed() for cache in self.served())
+
+def create_app(data_dir=None, preload=False, auto_reload=True):
+    """
+    Build the app over a data directory (default: data/ next to this file).
 
-@app.route('/')
+    With `preload`, every data file is loaded and indexed before the app is
+    returned, so a pre-forking server (see gunicorn.conf.py) shares it with
+    its workers copy-on-write. Without `auto_reload`, workers never check
+    the files on a request; the server reloads them instead.
+    """
+    app = Flask(__name__)
+    data_dir = data_dir or os.path.join(app.root_path, 'data')
+    app.extensions['data_files'] = DataFiles(data_dir, auto_reload)
+
+    # Per-route latency, bytes and status counts, served on /metrics
+    RequestMetrics().init_app(app)
+
+    app.register_blueprint(views)
+    if preload:
+        loaded = app.extensions['data_files'].preload()
+        app.logger.info('Preloaded %d data files from %s', len(loaded), data_dir)
+    return app
+
+def data_files():
+    """Data caches of the app handling the current request"""
+    return current_app.extensions['data_files']
+
+def dataset_response(dataset):
+    """Serve a dataset snapshot with a strong ETag and a pre-compressed body"""
+    encoding = dataset.negotiate(request.accept_encodings)
+    etag = dataset.etag_for(encoding)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = dataset.encoded(encoding) if encoding else dataset.body
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def query_response(dataset, build, *extra):
+    """Serve a query result, revalidated against the dataset versions and query string"""
+    datasets = (dataset,) + extra
+    versions = ':'.join(d.etag for d in datasets)
+    etag = hashlib.sha256(f'{versions}:{request.full_path}'.encode('utf-8')).hexdigest()[:32]
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        payload = build(*(d.index for d in datasets))
+        if payload is None:
+            return jsonify({'error': 'Not found'}), 404
+        response = jsonify(payload)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def ingredient_index():
+    """Snapshot backing the ingredient queries"""
+    return data_files().ingredient_index()
+
+def limit_arg(default: int) -> int:
+    """Read the `limit`/`n` query parameter, clamped to MAX_LIMIT"""
+    limit = request.args.get('limit', request.args.get('n', default, type=int), type=int)
+    return max(1, min(limit, MAX_LIMIT))
+
+@views.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/api/recipes', methods=['GET'])
+@views.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(current_app.extensions['request_metrics'].render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@views.route('/api/recipes', methods=['GET'])
 def get_recipes():
     try:
-        with open('data/processed_ingredients.json', 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
+        if request.args.get('format') == 'compact':
+            return dataset_response(data_files().compact.get())
+        return dataset_response(data_files().recipes.get())
+    except FileNotFoundError as e:
+        return jsonify({'error': f'{os.path.basename(e.filename)} not found; run scripts/process_recipes.py'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@views.route('/api/ingredients', methods=['GET'])
+def list_ingredients():
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        return query_response(ingredient_index(),
+                              lambda index: index.list(limit_arg(50), cursor, fields))
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@views.route('/api/ingredients/top', methods=['GET'])
+def top_ingredients():
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        return query_response(ingredient_index(),
+                              lambda index: {'items': index.top(limit_arg(20), fields)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@views.route('/api/ingredients/search', methods=['GET'])
+def search_ingredients():
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        query = request.args.get('q', '')
+        return query_response(ingredient_index(),
+                              lambda index: index.search(query, limit_arg(10), fields))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@views.route('/api/ingredients/category/<category>', methods=['GET'])
+def category_ingredients(category):
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        return query_response(ingredient_index(),
+                              lambda index: index.category(category, limit_arg(50), cursor, fields))
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@views.route('/api/cooccurrence', methods=['GET'])
+def get_cooccurrence():
+    try:
+        k = max(1, min(request.args.get('k', 15, type=int), MAX_HEATMAP_K))
+        return query_response(ingredient_index(),
+                              lambda index, cooccurrence: heatmap(index, cooccurrence, k),
+                              data_files().cooccurrence.get())
+    except FileNotFoundError:
+        return jsonify({'error': 'Co-occurrence data not found; run scripts/process_recipes.py'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@views.route('/api/graph', methods=['GET'])
+def get_graph():
+    try:
+        min_degree = request.args.get('min_degree', 1, type=int)
+        category = request.args.get('category')
+        top_k = max(1, min(request.args.get('top_k', DEFAULT_GRAPH_LINKS, type=int), MAX_GRAPH_LINKS))
+        return query_response(data_files().graph.get(),
+                              lambda graph: graph.subgraph(min_degree, category, top_k))
+    except FileNotFoundError:
+        return jsonify({'error': 'Graph data not found; run scripts/process_recipes.py'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@views.route('/api/ingredients/<path:name>', methods=['GET'])
+def ingredient_detail(name):
+    try:
+        return query_response(ingredient_index(), lambda index: index.get(name))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# The development server and tests use the lazily loading, auto-reloading app;
+# production serving goes through wsgi.py
+app = create_app()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=8080) 
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=8080)
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+from recipe_store import RecipeStore
+
+# Used when the processed data has no parsed quantities/units (scripts/process_recipes.py output)
+DEFAULT_QUANTITIES = {
+    '1': 20, '2': 18, '3': 8, '4': 5, '1/2': 8, '1 1/2': 3, '½': 2, '0.5': 2,
+    '100': 6, '200': 5, '250': 4, '400': 3
+}
+DEFAULT_UNITS = {
+    '': 30, 'g': 18, 'tbsp': 14, 'tsp': 12, 'ml': 6, 'cups': 5, 'cup': 3,
+    'kg': 2, 'pinch': 2, 'handful': 2, 'cloves': 4, 'slices': 2
+}
+
+
+class CorpusProfile(NamedTuple):
+    """Distributions a synthetic corpus is drawn from"""
+    names: List[str]
+    name_weights: List[int]
+    quantities: List[str]
+    quantity_weights: List[int]
+    units: List[str]
+    unit_weights: List[int]
+    categories: List[str]
+    titles: List[str]
+    lines_per_recipe: List[int]
+
+
+def load_profile(path: str = str(ROOT / 'data' / 'processed_ingredients.json')) -> CorpusProfile:
+    """
+    Derive corpus distributions from processed data.
+
+    Ingredient names are weighted by how often they occur; recipe sizes,
+    titles and categories are resampled from the recipes the data was
+    built from; quantities and units come from the parser's counts when
+    the data has them.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        ingredients = json.load(f)['ingredients']
+
+    recipe_sizes, quantities, units = Counter(), Counter(), Counter()
+    for data in ingredients.values():
+        for recipe in data['recipes']:
+            recipe_sizes[(recipe['title'], recipe['category'])] += 1
+        quantities.update(data.get('common_quantities', {}))
+        units.update(data.get('common_units', {}))
+    quantities = quantities or Counter(DEFAULT_QUANTITIES)
+    units = units or Counter(DEFAULT_UNITS)
+
+    names = sorted(ingredients)
+    return CorpusProfile(
+        names=names,
+        name_weights=[ingredients[name]['count'] for name in names],
+        quantities=sorted(quantities),
+        quantity_weights=[quantities[q] for q in sorted(quantities)],
+        units=sorted(units),
+        unit_weights=[units[u] for u in sorted(units)],
+        categories=sorted({category or 'other' for _, category in recipe_sizes}),
+        titles=sorted({title for title, _ in recipe_sizes}),
+        lines_per_recipe=[recipe_sizes[key] for key in sorted(recipe_sizes)]
+    )
+
+
+def generate_recipes(profile: CorpusProfile, lines: int, seed: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (recipe_id, recipe) pairs totalling `lines` ingredient lines, reproducibly for a seed"""
+    rng = random.Random(seed)
+    emitted = 0
+    n = 0
+    while emitted < lines:
+        size = min(rng.choice(profile.lines_per_recipe), lines - emitted)
+        category = rng.choice(profile.categories)
+        ingredient_lines = []
+        for name, quantity, unit in zip(rng.choices(profile.names, profile.name_weights, k=size),
+                                        rng.choices(profile.quantities, profile.quantity_weights, k=size),
+                                        rng.choices(profile.units, profile.unit_weights, k=size)):
+            ingredient_lines.append(' '.join(part for part in (quantity, unit, name) if part))
+        yield f'{category}_synthetic_{n:07d}', {
+            'title': f'{rng.choice(profile.titles)} {n}',
+            'category': category,
+            'ingredients': ingredient_lines,
+            'url': f'https://example.com/synthetic/{n}'
+        }
+        emitted += size
+        n += 1
+
+
+def write_corpus(data_dir: str, lines: int, seed: int = 0, profile: CorpusProfile = None) -> int:
+    """Write a synthetic corpus into the recipe store in data_dir and return the recipe count"""
+    os.makedirs(data_dir, exist_ok=True)
+    profile = profile or load_profile()
+    store = RecipeStore(data_dir)
+    recipes = 0
+    for recipe_id, recipe in generate_recipes(profile, lines, seed):
+        store.append(recipe_id, recipe)
+        recipes += 1
+    return recipes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic recipe corpus')
+    parser.add_argument('data_dir', help='directory to write recipes.jsonl into')
+    parser.add_argument('--lines', type=int, default=10000, help='total ingredient lines')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    count = write_corpus(args.data_dir, args.lines, args.seed)
+    print(f"Wrote {count} recipes ({args.lines} ingredient lines) to {args.data_dir}")
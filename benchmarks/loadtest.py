@@ -0,0 +1,127 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+# Endpoints hit in turn; each gets the full duration at the chosen concurrency
+ENDPOINTS = [
+    '/api/recipes',
+    '/api/recipes?format=compact',
+    '/api/ingredients?limit=50',
+    '/api/ingredients/top?n=20',
+    '/api/ingredients/search?q=oil',
+    '/api/ingredients/category/asian?limit=50',
+    '/api/cooccurrence?k=15',
+    '/api/graph?top_k=100'
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def hammer(base_url: str, path: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """
+    Request one path from `concurrency` keep-alive connections for `duration` seconds.
+
+    Responses are read in full, as a browser accepting gzip would; each
+    connection waits for its response before sending the next request.
+    A request on a kept-alive connection the server has just closed (e.g.
+    by a worker exiting after a reload) is retried once on a new
+    connection, as browsers do.
+    """
+    url = urlsplit(base_url)
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors: List[int] = [0] * concurrency
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def connect() -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+
+    def client(slot: int) -> None:
+        connection, reused = connect(), False
+        own_statuses: Dict[int, int] = {}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            for _ in range(2 if reused else 1):
+                try:
+                    connection.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+                    response = connection.getresponse()
+                    response.read()
+                    break
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = connect()
+            else:
+                errors[slot] += 1
+                reused = False
+                continue
+            reused = not response.will_close
+            latencies[slot].append(time.perf_counter() - start)
+            own_statuses[response.status] = own_statuses.get(response.status, 0) + 1
+        connection.close()
+        with lock:
+            for status, count in own_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings = sorted(latency for slot in latencies for latency in slot)
+    result = {
+        'path': path,
+        'concurrency': concurrency,
+        'requests': len(timings),
+        'errors': sum(errors),
+        'statuses': statuses,
+        'requests_per_s': len(timings) / elapsed if elapsed else None
+    }
+    if timings:
+        result.update(p50_s=percentile(timings, 0.5), p99_s=percentile(timings, 0.99), max_s=timings[-1])
+    return result
+
+
+def run(base_url: str, paths: List[str], concurrency: int, duration: float, warmup: float) -> List[Dict[str, Any]]:
+    results = []
+    print(f"{base_url}: {concurrency} connections, {duration:g}s per endpoint")
+    for path in paths:
+        if warmup > 0:
+            hammer(base_url, path, concurrency, warmup)
+        result = hammer(base_url, path, concurrency, duration)
+        results.append(result)
+        statuses = ', '.join(f'{status}: {count}' for status, count in sorted(result['statuses'].items()))
+        if result['requests']:
+            print(f"  {path}: {result['requests_per_s']:.0f} req/s, p50 {result['p50_s'] * 1e3:.2f}ms, "
+                  f"p99 {result['p99_s'] * 1e3:.2f}ms ({statuses}; {result['errors']} errors)")
+        else:
+            print(f"  {path}: no successful requests ({result['errors']} errors)")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Load-test a running server, e.g. gunicorn -c gunicorn.conf.py wsgi:app')
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='server base URL')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per endpoint')
+    parser.add_argument('--warmup', type=float, default=1.0, help='untimed seconds per endpoint first')
+    parser.add_argument('--paths', nargs='+', default=ENDPOINTS, help='paths to test (default: the API endpoints)')
+    parser.add_argument('--output', default=None, help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.url.rstrip('/'), args.paths, args.concurrency, args.duration, args.warmup)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'url': args.url, 'concurrency': args.concurrency, 'duration_s': args.duration,
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,77 @@
+import argparse
+import re
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from corpus import ROOT, generate_recipes, load_profile
+
+sys.path.insert(0, str(ROOT / 'scripts'))
+from process_ingredients import IngredientProcessor
+
+
+def legacy_parse(processor: IngredientProcessor, text: str, words: List[str]) -> tuple:
+    """The per-word set-scan parser that IngredientLineParser replaced, kept for comparison"""
+    quantities = []
+    for q in re.findall(r'(\d+(?:/\d+)?|\d*\.\d+|\d+)', text):
+        if '/' in q:
+            num, denom = map(float, q.split('/'))
+            quantities.append(str(num / denom))
+        else:
+            quantities.append(q)
+    units = [word for word in words if word in processor.units]
+    ingredient_words = set(words)
+    categories = [category for category, terms in processor.categories.items()
+                  if any(term in ingredient_words for term in terms)] or ['other']
+    name = ' '.join(word for word in words
+                    if word not in processor.stop_words
+                    and word not in processor.units
+                    and not re.match(r'^\d+(?:/\d+)?$', word))
+    return tuple(quantities), tuple(units), tuple(categories), name
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(lines: int, seed: int, repeat: int) -> None:
+    processor = IngredientProcessor()
+    stop_words = processor.stop_words
+    texts = [ingredient.lower() for _, recipe in generate_recipes(load_profile(), lines, seed)
+             for ingredient in recipe['ingredients']]
+    # Tokenization is shared by both parsers, so it is done up front and not timed
+    parsed: List[Tuple[str, List[str]]] = [(text, processor.tokenize(text)) for text in texts]
+
+    legacy = best_of(repeat, lambda: [legacy_parse(processor, text, words) for text, words in parsed])
+    compiled = best_of(repeat, lambda: [processor.parser.parse(text, words, stop_words) for text, words in parsed])
+    print(f"{len(parsed)} lines (best of {repeat}):")
+    print(f"  legacy:   {legacy:.3f}s ({len(parsed) / legacy:.0f} lines/s)")
+    print(f"  compiled: {compiled:.3f}s ({len(parsed) / compiled:.0f} lines/s), {legacy / compiled:.1f}x")
+
+    # Units, categories and names should agree; quantities differ where mixed,
+    # decimal or unicode fractions are now parsed as one value
+    differences = {'quantities': [], 'units': [], 'categories': [], 'name': []}
+    for text, words in parsed:
+        old = legacy_parse(processor, text, words)
+        new = processor.parser.parse(text, words, stop_words)
+        for i, field in enumerate(differences):
+            if old[i] != new[i]:
+                differences[field].append((text, old[i], new[i]))
+    for field, cases in differences.items():
+        print(f"  {field}: {len(cases)} lines differ")
+        for text, old, new in cases[:3]:
+            print(f"    {text!r}: {old!r} -> {new!r}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the compiled ingredient line parser with the legacy one')
+    parser.add_argument('--lines', type=int, default=100000, help='ingredient lines to parse')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.lines, args.seed, args.repeat)
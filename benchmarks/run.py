@@ -0,0 +1,209 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from corpus import ROOT, load_profile, write_corpus
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'scripts'))
+import process_recipes
+from build_index import save_index
+from compact_format import save_compact
+
+# Corpus sizes in ingredient lines; pass --sizes 1000000 for the largest run
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Requests timed against the API, after one cold request that loads the data
+API_REQUESTS = [
+    '/api/recipes',
+    '/api/recipes?format=compact',
+    '/api/ingredients?limit=50',
+    '/api/ingredients/top?n=20',
+    '/api/ingredients/search?q=oil',
+    '/api/ingredients/search?q=chiken'
+]
+
+
+def measure(fn: Callable[[], Any], memory: bool = True) -> Dict[str, Any]:
+    """
+    Time one call of fn, then repeat it under tracemalloc for peak memory.
+
+    Memory is traced in a separate call so tracing overhead doesn't skew
+    the timings.
+    """
+    gc.collect()
+    wall, cpu = time.perf_counter(), time.process_time()
+    fn()
+    result = {'wall_s': time.perf_counter() - wall, 'cpu_s': time.process_time() - cpu}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def nltk_available() -> bool:
+    """Whether IngredientProcessor can run without downloading NLTK data"""
+    try:
+        import nltk
+        from setup_nltk import RESOURCES, TOKENIZER_RESOURCE
+        for resource_name in (TOKENIZER_RESOURCE, 'stopwords', 'wordnet'):
+            nltk.data.find(RESOURCES[resource_name])
+        return True
+    except (ImportError, LookupError):
+        return False
+
+
+def bench_pipeline(data_dir: str, lines: int, memory: bool, workers: int) -> List[Dict[str, Any]]:
+    """Time the aggregation stages over a corpus"""
+    results = []
+
+    def record(stage: str, fn: Callable[[], Any]) -> None:
+        result = measure(fn, memory)
+        result.update(stage=stage, lines=lines, lines_per_s=lines / result['wall_s'] if result['wall_s'] else None)
+        results.append(result)
+        print(f"  {stage}: {result['wall_s']:.3f}s wall, {result['cpu_s']:.3f}s cpu"
+              + (f", {result['peak_bytes'] / 1e6:.1f} MB peak" if memory else ''))
+
+    recipes = list(process_recipes.load_recipes(data_dir))
+    ingredient_data, category_counts = process_recipes.process_ingredients(recipes)
+    record('process_recipes.load_recipes', lambda: list(process_recipes.load_recipes(data_dir)))
+    record('process_recipes.process_ingredients', lambda: process_recipes.process_ingredients(recipes))
+    record('process_recipes.create_visualization_data',
+           lambda: process_recipes.create_visualization_data(ingredient_data, category_counts))
+
+    if nltk_available():
+        from process_ingredients import IngredientProcessor
+
+        def run_processor():
+            processor = IngredientProcessor(data_dir)
+            processor.process_ingredients(workers=workers, recipes=processor.iter_recipes())
+        record('IngredientProcessor.process_ingredients', run_processor)
+    else:
+        print("  IngredientProcessor.process_ingredients: skipped (NLTK data not installed)")
+        results.append({'stage': 'IngredientProcessor.process_ingredients', 'lines': lines,
+                        'skipped': 'NLTK data not installed'})
+    return results
+
+
+def bench_api(data_dir: str, lines: int, repeat: int) -> List[Dict[str, Any]]:
+    """Time API requests through Flask's test client against the corpus's processed data"""
+    from app import create_app
+
+    ingredient_data, category_counts = process_recipes.process_ingredients(process_recipes.load_recipes(data_dir))
+    processed = process_recipes.create_visualization_data(ingredient_data, category_counts)
+    processed_path = os.path.join(data_dir, 'processed_ingredients.json')
+    with open(processed_path, 'w') as f:
+        json.dump(processed, f, indent=2)
+    save_compact(processed, os.path.join(data_dir, 'processed_ingredients.compact.json'))
+    save_index(processed, os.path.join(data_dir, 'ingredients.idx'))
+
+    client = create_app(data_dir).test_client()
+
+    results = []
+    for url in API_REQUESTS:
+        start = time.perf_counter()
+        response = client.get(url)
+        cold = time.perf_counter() - start
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        result = {
+            'stage': f'api {url}',
+            'lines': lines,
+            'status': response.status_code,
+            'bytes': len(response.data),
+            'cold_s': cold,
+            'median_s': statistics.median(timings),
+            'p95_s': timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        }
+        results.append(result)
+        print(f"  api {url}: {result['status']}, cold {cold * 1e3:.1f}ms, "
+              f"median {result['median_s'] * 1e3:.2f}ms, p95 {result['p95_s'] * 1e3:.2f}ms")
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    """Print each timing relative to a previous results file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['stage'], r['lines']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results['results']:
+        before = baseline.get((result['stage'], result['lines']))
+        metric = 'wall_s' if 'wall_s' in result else 'median_s'
+        if not before or metric not in result or not before.get(metric):
+            continue
+        ratio = result[metric] / before[metric]
+        flag = '  <-- slower' if ratio > 1.1 else ''
+        print(f"  {result['lines']:>8} {result['stage']}: {before[metric]:.4f}s -> {result[metric]:.4f}s "
+              f"({ratio:.2f}x){flag}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the processing pipeline and API on synthetic corpora')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='corpus sizes in ingredient lines')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=50, help='timed requests per API endpoint')
+    parser.add_argument('--workers', type=int, default=1, help='IngredientProcessor worker processes')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', default=None,
+                        help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='previous results file to compare against')
+    args = parser.parse_args()
+
+    profile = load_profile()
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'workers': args.workers
+        },
+        'results': []
+    }
+    for lines in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            start = time.perf_counter()
+            recipes = write_corpus(data_dir, lines, args.seed, profile)
+            print(f"\n{lines} lines ({recipes} recipes, generated in {time.perf_counter() - start:.1f}s)")
+            results['results'].extend(bench_pipeline(data_dir, lines, not args.no_memory, args.workers))
+            results['results'].extend(bench_api(data_dir, lines, args.repeat))
+    # Peak resident set of the whole run (kilobytes on Linux)
+    results['meta']['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    output = args.output or str(ROOT / 'benchmarks' / 'results' / f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
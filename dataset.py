@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+# Encodings a body can be served in, best first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body for one content encoding at the highest level"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+class Dataset:
+    """
+    An immutable snapshot of a processed JSON data file.
+
+    Only the serialized body and the query index are kept, not the parsed
+    tree. Every endpoint serves either the body or index lookups. Under a
+    preloading server, reference counting would make each worker touch,
+    and so copy, the pages of a tree of Python objects.
+    """
+
+    def __init__(self, body: bytes, mtime_ns: int, size: int, index: Any = None):
+        self.index = index
+        self.body = body
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+        # Compressed once per dataset version and encoding, on first use, so
+        # snapshots that only back an index are never compressed at all
+        self._encoded: Dict[str, bytes] = {}
+        self._encode_lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body in one content encoding, compressed on first use"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            with self._encode_lock:
+                body = self._encoded.get(encoding)
+                if body is None:
+                    body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def precompress(self) -> None:
+        """Compress the body in every encoding up front, e.g. before workers fork"""
+        for encoding in ENCODINGS:
+            self.encoded(encoding)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag for one representation of this snapshot"""
+        return f'{self.etag}-{encoding}' if encoding else self.etag
+
+    def negotiate(self, accept_encodings) -> Optional[str]:
+        """Pick the best pre-compressed encoding the client accepts"""
+        for encoding in ENCODINGS:
+            if accept_encodings[encoding] > 0:
+                return encoding
+        return None
+
+    @classmethod
+    def from_file(cls, path: str, mtime_ns: int, size: int,
+                  index_factory: Optional[Callable[[Any], Any]] = None) -> 'Dataset':
+        """
+        Parse a data file, pre-serialize it and build its query index.
+
+        The parsed tree is not kept beyond what the index holds on to.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        index = index_factory(data) if index_factory is not None else None
+        return cls(body, mtime_ns, size, index)
+
+
+class DatasetCache:
+    """
+    Process-wide holder for a processed data file.
+
+    The file is parsed once and the resulting snapshot is reused until the
+    file's mtime or size changes. Snapshots (including any query index
+    built by `index_factory`) are swapped with a single reference
+    assignment, so readers never see a partially loaded dataset.
+
+    Without `auto_reload`, a loaded snapshot is served without checking the
+    file at all until `reload()` is called, e.g. by a server that reloads
+    data before forking fresh workers.
+    """
+
+    def __init__(self, path: str, index_factory: Optional[Callable[[Any], Any]] = None,
+                 auto_reload: bool = True):
+        self.path = path
+        self.index_factory = index_factory
+        self.auto_reload = auto_reload
+        self._current: Optional[Dataset] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Dataset:
+        """Return the current snapshot, reloading it if the file changed"""
+        current = self._current
+        if current is not None and not self.auto_reload:
+            return current
+        return self.reload()
+
+    def changed(self) -> bool:
+        """Whether the file exists and differs from the loaded snapshot (or none is loaded)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        current = self._current
+        return current is None or (current.mtime_ns, current.size) != (st.st_mtime_ns, st.st_size)
+
+    def reload(self) -> Dataset:
+        """Return the current snapshot, loading the file first if it changed"""
+        st = os.stat(self.path)
+        current = self._current
+        if current is not None and (current.mtime_ns, current.size) == (st.st_mtime_ns, st.st_size):
+            return current
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            current = self._current
+            if current is None or (current.mtime_ns, current.size) != (st.st_mtime_ns, st.st_size):
+                current = self.load(st)
+                self._current = current
+            return current
+
+    def load(self, st: os.stat_result) -> Dataset:
+        """Build a snapshot of the file as described by `st`"""
+        return Dataset.from_file(self.path, st.st_mtime_ns, st.st_size, self.index_factory)
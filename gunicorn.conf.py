@@ -0,0 +1,90 @@
+"""
+Gunicorn settings for serving wsgi:app in production.
+
+The app is preloaded in the master, so the parsed data and indexes are
+built once and shared with every worker copy-on-write. SIGHUP (`kill -HUP
+<master pid>`) reloads changed data files in the master, forks fresh
+workers from it and lets the old ones finish their in-flight requests
+before exiting. The master also polls the data files and does the same
+when one changes.
+"""
+import gc
+import os
+import signal
+import threading
+import time
+
+bind = os.environ.get('BIND', '0.0.0.0:8080')
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 4))
+preload_app = True
+# How long old workers get to finish in-flight requests after a reload
+graceful_timeout = 30
+
+# Seconds between data file checks in the master; 0 reloads only on SIGHUP
+DATA_RELOAD_INTERVAL = float(os.environ.get('DATA_RELOAD_INTERVAL', 5))
+
+# Longest wait for a triggered reload to pick up the changed files before signalling again
+DATA_RELOAD_TIMEOUT = 120
+
+
+def _data_files(server):
+    return server.app.wsgi().extensions['data_files']
+
+
+def _file_states(data_files):
+    states = []
+    for cache in data_files.served():
+        try:
+            st = os.stat(cache.path)
+        except FileNotFoundError:
+            states.append(None)
+            continue
+        states.append((st.st_mtime_ns, st.st_size))
+    return states
+
+
+def _watch_data_files(server):
+    data_files = _data_files(server)
+    pending = None
+    while True:
+        time.sleep(DATA_RELOAD_INTERVAL)
+        if not data_files.changed():
+            pending = None
+            continue
+        # Only reload once the files have stopped changing, so none is read mid-write
+        states = _file_states(data_files)
+        if states != pending:
+            pending = states
+            continue
+        server.log.info("Data files changed; reloading workers")
+        os.kill(os.getpid(), signal.SIGHUP)
+        # The reload runs on the master's main loop; don't signal again while it is underway
+        deadline = time.monotonic() + DATA_RELOAD_TIMEOUT
+        while data_files.changed() and time.monotonic() < deadline:
+            time.sleep(DATA_RELOAD_INTERVAL)
+        pending = None
+
+
+def when_ready(server):
+    if DATA_RELOAD_INTERVAL > 0:
+        threading.Thread(target=_watch_data_files, args=(server,), daemon=True).start()
+
+
+def on_reload(server):
+    # Runs in the master on SIGHUP, before the new workers are forked
+    try:
+        loaded = _data_files(server).preload()
+    except Exception:
+        # e.g. a file caught mid-write; files not yet reloaded keep their previous
+        # snapshot, and the watcher tries again on its next check
+        server.log.exception("Reloading data files failed")
+        return
+    server.log.info("Reloaded data files: %s", ', '.join(loaded) or 'none found')
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's generations, so
+    # collections in the workers don't write to (and so copy) shared pages
+    gc.freeze()
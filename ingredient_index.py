@@ -0,0 +1,300 @@
+import base64
+import heapq
+import json
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Fields returned by the listing endpoints when no projection is requested
+DEFAULT_FIELDS = ('count', 'categories')
+
+# Element types of the sort keys behind each paginated listing
+NAME_KEY = (str,)
+COUNT_KEY = (int, str)
+
+# Share of a query's trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that encode_cursor did not produce for this listing"""
+
+
+def encode_cursor(key: Tuple) -> str:
+    """Encode a sort key as an opaque pagination cursor"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, key_types: Tuple[type, ...]) -> Tuple:
+    """
+    Decode a cursor produced by encode_cursor for a key of the given element
+    types, raising InvalidCursor for anything else
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}') from e
+    if (not isinstance(key, list) or len(key) != len(key_types)
+            or not all(type(value) is key_type for value, key_type in zip(key, key_types))):
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+    return tuple(key)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a search query and collapse whitespace, matching processed names"""
+    return ' '.join(query.lower().split())
+
+
+def name_grams(name: str) -> List[str]:
+    """Distinct character trigrams of a name, space-padded so word starts are grams too"""
+    padded = f' {name} '
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def gram_postings(names: Iterable[str]) -> Dict[str, List[int]]:
+    """Map each trigram to the ascending ids (positions in `names`) of the names containing it"""
+    postings = defaultdict(list)
+    for i, name in enumerate(names):
+        for gram in name_grams(name):
+            postings[gram].append(i)
+    return dict(postings)
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Parse a comma-separated field projection"""
+    if not fields:
+        return DEFAULT_FIELDS
+    return tuple(f.strip() for f in fields.split(',') if f.strip())
+
+
+class IngredientIndex:
+    """
+    Lookup structures over the processed ingredient map, built once per
+    dataset snapshot so queries never scan the whole dataset.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.ingredients: Dict[str, Dict[str, Any]] = data.get('ingredients', {})
+
+        # Name order backs cursor pagination over the full listing
+        self.by_name: List[str] = sorted(self.ingredients)
+
+        # Count order backs top-N and per-category listings
+        self.by_count: List[str] = sorted(self.ingredients, key=self.count_key)
+
+        by_category = defaultdict(list)
+        for name in self.by_count:
+            for category in self.ingredients[name].get('categories', []):
+                by_category[category].append(name)
+        self.by_category: Dict[str, List[str]] = dict(by_category)
+
+        # Counts and trigram postings by position in by_name, for search
+        self.counts: List[int] = [self.ingredients[name]['count'] for name in self.by_name]
+        self.grams: Dict[str, List[int]] = gram_postings(self.by_name)
+
+    def count_key(self, name: str) -> Tuple[int, str]:
+        """Sort key ordering ingredients by descending count, then name"""
+        return (-self.ingredients[name]['count'], name)
+
+    def project(self, name: str, fields: Iterable[str]) -> Dict[str, Any]:
+        """Return an ingredient record restricted to the requested fields"""
+        record = self.ingredients[name]
+        projected = {'ingredient': name}
+        for field in fields:
+            if field in record:
+                projected[field] = record[field]
+        return projected
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the full record for one ingredient"""
+        if name not in self.ingredients:
+            return None
+        return self.project(name, self.ingredients[name].keys())
+
+    def top(self, n: int, fields: Iterable[str] = DEFAULT_FIELDS) -> List[Dict[str, Any]]:
+        """Return the n most common ingredients"""
+        return [self.project(name, fields) for name in self.by_count[:n]]
+
+    def page(self, names: List[str], key, key_types: Tuple[type, ...], limit: int,
+             cursor: Optional[str] = None, fields: Iterable[str] = DEFAULT_FIELDS) -> Dict[str, Any]:
+        """Keyset-paginate a list of names that is sorted by `key`, whose elements have `key_types`"""
+        start = 0
+        if cursor:
+            start = bisect_right(names, decode_cursor(cursor, key_types), key=key)
+        chunk = names[start:start + limit]
+
+        next_cursor = None
+        if chunk and start + limit < len(names):
+            next_cursor = encode_cursor(key(chunk[-1]))
+
+        return {
+            'items': [self.project(name, fields) for name in chunk],
+            'next_cursor': next_cursor,
+            'total': len(names)
+        }
+
+    def list(self, limit: int, cursor: Optional[str] = None,
+             fields: Iterable[str] = DEFAULT_FIELDS) -> Dict[str, Any]:
+        """Page through all ingredients in name order"""
+        return self.page(self.by_name, lambda name: (name,), NAME_KEY, limit, cursor, fields)
+
+    def category(self, category: str, limit: int, cursor: Optional[str] = None,
+                 fields: Iterable[str] = DEFAULT_FIELDS) -> Optional[Dict[str, Any]]:
+        """Page through one category's ingredients in count order"""
+        if category not in self.by_category:
+            return None
+        return self.page(self.by_category[category], self.count_key, COUNT_KEY, limit, cursor, fields)
+
+    def gram_postings(self, gram: str) -> Sequence[int]:
+        """Ids of the names containing a trigram"""
+        return self.grams.get(gram, ())
+
+    def search(self, query: str, limit: int = 10, fields: Iterable[str] = DEFAULT_FIELDS) -> Dict[str, Any]:
+        """
+        Autocomplete over ingredient names, ranked by count within each tier.
+
+        Names starting with the query rank first (a range of the sorted
+        name list), then names containing it (word starts only for
+        two-letter queries), then fuzzy matches by trigram similarity.
+        """
+        query = normalize_query(query)
+        tiers: Dict[int, int] = {}
+        if query:
+            lo = bisect_left(self.by_name, query)
+            hi = bisect_left(self.by_name, query + '\U0010ffff', lo)
+            tiers.update(dict.fromkeys(range(lo, hi), 0))
+
+        if len(query) == 2:
+            for i in self.gram_postings(' ' + query):
+                tiers.setdefault(i, 1)
+        elif len(query) >= 3:
+            # Substrings: every trigram of the query must occur in the name
+            inner = sorted((self.gram_postings(query[i:i + 3]) for i in range(len(query) - 2)), key=len)
+            candidates = set(inner[0]).intersection(*inner[1:])
+            for i in candidates:
+                if i not in tiers and query in self.by_name[i]:
+                    tiers[i] = 1
+
+            # Misspellings: most of the query's trigrams, including word boundaries
+            grams = name_grams(query)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.gram_postings(gram))
+            for i, n in shared.items():
+                if i not in tiers and n / len(grams) >= FUZZY_THRESHOLD:
+                    tiers[i] = 2
+
+        best = heapq.nsmallest(limit, tiers, key=lambda i: (tiers[i], -self.counts[i], i))
+        return {
+            'query': query,
+            'items': [self.project(self.by_name[i], fields) for i in best],
+            'total': len(tiers)
+        }
+
+
+class CooccurrenceIndex:
+    """Pair lookups over the sparse co-occurrence matrix from the pipeline"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.names: List[str] = data['ingredients']
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.pairs: Dict[Tuple[int, int], int] = {(i, j): count for i, j, count in data['pairs']}
+
+    def shared(self, a: str, b: str) -> int:
+        """Number of recipes containing both ingredients"""
+        i, j = self.ids.get(a), self.ids.get(b)
+        if i is None or j is None or i == j:
+            return 0
+        if i > j:
+            i, j = j, i
+        return self.pairs.get((i, j), 0)
+
+
+def heatmap(ingredients: IngredientIndex, cooccurrence: CooccurrenceIndex, k: int,
+            examples: int = 3) -> Dict[str, Any]:
+    """
+    Relationship matrix for the k most common ingredients.
+
+    Scores weight shared categories twice as much as shared recipes, as
+    the dashboard always has. Only k x k cells are touched.
+    """
+    names = ingredients.by_count[:k]
+    records = [ingredients.ingredients[name] for name in names]
+    titles = [list(dict.fromkeys(r['title'] for r in record.get('recipes', []))) for record in records]
+    size = len(names)
+
+    score = [[0.0] * size for _ in range(size)]
+    shared_recipes = [[0] * size for _ in range(size)]
+    shared_examples = [[[] for _ in range(size)] for _ in range(size)]
+    for i in range(size):
+        for j in range(i + 1, size):
+            recipes = cooccurrence.shared(names[i], names[j])
+            categories = len(set(records[i]['categories']) & set(records[j]['categories']))
+            score[i][j] = score[j][i] = (categories * 2 + recipes) / 3
+            shared_recipes[i][j] = shared_recipes[j][i] = recipes
+            if recipes:
+                other = set(titles[j])
+                sample = [title for title in titles[i] if title in other][:examples]
+                shared_examples[i][j] = shared_examples[j][i] = sample
+
+    return {
+        'ingredients': [{
+            'ingredient': name,
+            'count': record['count'],
+            'categories': record['categories'],
+            'top_units': sorted(record.get('common_units', {}).items(), key=lambda u: -u[1])[:2]
+        } for name, record in zip(names, records)],
+        'score': score,
+        'shared_recipes': shared_recipes,
+        'shared_examples': shared_examples
+    }
+
+
+class GraphIndex:
+    """Pruning queries over the recipe/ingredient graph from the pipeline"""
+
+    def __init__(self, data: Dict[str, Any]):
+        nodes, edges = data['nodes'], data['edges']
+        self.labels: List[str] = nodes['label']
+        self.types: List[str] = nodes['type']
+        self.degree: List[int] = nodes['degree']
+        self.categories: List[set] = [set(c) for c in nodes['categories']]
+
+        # Heaviest edges first, so top-K is a prefix of any filtered scan
+        self.edges: List[Tuple[int, int, int]] = sorted(
+            zip(edges['source'], edges['target'], edges['weight']),
+            key=lambda e: (-e[2], -(self.degree[e[0]] + self.degree[e[1]]), e[0], e[1])
+        )
+
+    def subgraph(self, min_degree: int = 1, category: Optional[str] = None,
+                 top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Return the nodes and links that survive pruning.
+
+        Nodes below `min_degree` or outside `category` are dropped along
+        with their edges; `top_k` then keeps only the heaviest edges.
+        """
+        def keep(node: int) -> bool:
+            if self.degree[node] < min_degree:
+                return False
+            return category is None or category in self.categories[node]
+
+        links = []
+        for source, target, weight in self.edges:
+            if top_k is not None and len(links) >= top_k:
+                break
+            if keep(source) and keep(target):
+                links.append({'source': source, 'target': target, 'weight': weight})
+
+        node_ids = sorted({link['source'] for link in links} | {link['target'] for link in links})
+        return {
+            'nodes': [{
+                'id': node,
+                'label': self.labels[node],
+                'type': self.types[node],
+                'degree': self.degree[node]
+            } for node in node_ids],
+            'links': links,
+            'total_nodes': len(self.labels),
+            'total_links': len(self.edges)
+        }
@@ -0,0 +1,113 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from flask import Flask, g, request
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics for a Flask app, in Prometheus text format.
+
+    Latency histograms, response bytes and status counts are keyed by the
+    matched URL rule (e.g. `/api/ingredients/<path:name>`) rather than the
+    raw path, so label cardinality stays bounded. 304 responses are ETag
+    cache hits. Counters are per process; with several server workers,
+    each reports its own.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], List[int]] = {}
+        self._latency_sum: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._bytes: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._statuses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions['request_metrics'] = self
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        """Record one request"""
+        key = (method, route)
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._latency.get(key)
+            if counts is None:
+                counts = self._latency[key] = [0] * (len(self.buckets) + 1)
+            counts[bucket] += 1
+            self._latency_sum[key] += seconds
+            self._bytes[key] += size
+            self._statuses[(method, route, status)] += 1
+
+    @staticmethod
+    def _route() -> str:
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    def _start(self) -> None:
+        g.metrics_start = time.perf_counter()
+
+    def _finish(self, response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            self.observe(request.method, self._route(), response.status_code,
+                         time.perf_counter() - start, response.calculate_content_length() or 0)
+        return response
+
+    def _teardown(self, exc) -> None:
+        # after_request doesn't run for unhandled exceptions; count those as 500s
+        start = g.pop('metrics_start', None)
+        if start is not None and exc is not None:
+            self.observe(request.method, self._route(), 500, time.perf_counter() - start, 0)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            latency = {key: list(counts) for key, counts in self._latency.items()}
+            latency_sum = dict(self._latency_sum)
+            sizes = dict(self._bytes)
+            statuses = dict(self._statuses)
+
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by route.',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        for (method, route), counts in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'http_request_duration_seconds_bucket{_labels(method=method, route=route, le=le)} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{_labels(method=method, route=route)} {latency_sum[(method, route)]}')
+            lines.append(f'http_request_duration_seconds_count{_labels(method=method, route=route)} {cumulative}')
+
+        lines += [
+            '# HELP http_response_bytes_total Response body bytes sent by route.',
+            '# TYPE http_response_bytes_total counter'
+        ]
+        for (method, route), size in sorted(sizes.items()):
+            lines.append(f'http_response_bytes_total{_labels(method=method, route=route)} {size}')
+
+        lines += [
+            '# HELP http_requests_total Requests by route and status code.',
+            '# TYPE http_requests_total counter'
+        ]
+        for (method, route, status), count in sorted(statuses.items()):
+            lines.append(f'http_requests_total{_labels(method=method, route=route, status=status)} {count}')
+        return '\n'.join(lines) + '\n'
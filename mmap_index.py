@@ -0,0 +1,211 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from dataset import DatasetCache
+from ingredient_index import IngredientIndex
+
+# File signature; scripts/build_index.py writes files in this format
+MAGIC = b'WFIDX003'
+
+# Record fields stored as arrays; anything else is kept as per-ingredient JSON
+CORE_FIELDS = ('count', 'recipes', 'categories')
+
+
+class _StringTable(Sequence):
+    """Strings stored as a UTF-8 blob plus an offsets array, decoded on access"""
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+
+class _Names(Sequence):
+    """Ingredient names for a sequence of ingredient ids, decoded on access"""
+
+    def __init__(self, index: 'MmapIngredientIndex', ids=None):
+        self._index = index
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return self._index.size if self._ids is None else len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self._index.name(i if self._ids is None else self._ids[i])
+
+
+class _Records(Mapping):
+    """Full ingredient records by name, materialized one at a time on access"""
+
+    def __init__(self, index: 'MmapIngredientIndex'):
+        self._index = index
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        record = self._index.get(name)
+        if record is None:
+            raise KeyError(name)
+        del record['ingredient']
+        return record
+
+    def __contains__(self, name) -> bool:
+        return self._index.lookup(name) is not None
+
+    def __len__(self) -> int:
+        return self._index.size
+
+    def __iter__(self):
+        return iter(_Names(self._index))
+
+
+class MmapIngredientIndex(IngredientIndex):
+    """
+    IngredientIndex over a memory-mapped file from scripts/build_index.py.
+
+    Sections are read through memoryviews into the mapping, so processes
+    that open the same file share its pages and no per-ingredient objects
+    exist until a query touches them. Lookups binary-search the sorted
+    name table; listings and top-N walk the precomputed id orders, and
+    search reads trigram postings from the file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path} is not a current ingredient index; rebuild it with scripts/build_index.py')
+        (header_size,) = struct.unpack_from('<Q', view, len(MAGIC))
+        data_start = len(MAGIC) + 8 + header_size
+        header = json.loads(bytes(view[len(MAGIC) + 8:data_start]))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} was built on a {header["byteorder"]}-endian machine')
+
+        self.version: str = header['version']
+        # Path (relative to this file), size and mtime of the JSON the index was built from
+        self.source: Optional[Dict[str, Any]] = header['source']
+        self.size: int = header['ingredients']
+        self.recipe_categories: List[str] = header['recipe_categories']
+        self.ingredient_categories: List[str] = header['ingredient_categories']
+        self._sections = {}
+        for name, (offset, length, typecode) in header['sections'].items():
+            section = view[data_start + offset:data_start + offset + length]
+            self._sections[name] = section if typecode == 'B' else section.cast(typecode)
+
+        self._names = _StringTable(self._sections['names'], self._sections['name_offsets'])
+        self._grams = _StringTable(self._sections['grams'], self._sections['gram_offsets'])
+        self.counts = self._sections['count']
+
+        self.ingredients = _Records(self)
+        self.by_name = _Names(self)
+        self.by_count = _Names(self, self._sections['by_count'])
+        members, offsets = self._sections['by_category'], self._sections['by_category_offsets']
+        self.by_category = {
+            category: _Names(self, members[offsets[i]:offsets[i + 1]])
+            for i, category in enumerate(self.ingredient_categories)
+        }
+
+    def name(self, i: int) -> str:
+        """Ingredient name for an ingredient id"""
+        return self._names[i]
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Ingredient id for a name, by binary search over the sorted name table"""
+        if not isinstance(name, str):
+            return None
+        i = bisect_left(self.by_name, name)
+        if i < self.size and self.by_name[i] == name:
+            return i
+        return None
+
+    def count_key(self, name: str):
+        return (-self.counts[self.lookup(name)], name)
+
+    def gram_postings(self, gram: str) -> Sequence[int]:
+        g = bisect_left(self._grams, gram)
+        if g == len(self._grams) or self._grams[g] != gram:
+            return ()
+        offsets = self._sections['gram_posting_offsets']
+        return self._sections['gram_postings'][offsets[g]:offsets[g + 1]]
+
+    def _field(self, i: int, field: str, extras: Optional[Dict[str, Any]]) -> Any:
+        if field == 'count':
+            return self.counts[i]
+        if field == 'categories':
+            offsets = self._sections['category_offsets']
+            return [self.ingredient_categories[c]
+                    for c in self._sections['categories'][offsets[i]:offsets[i + 1]]]
+        if field == 'recipes':
+            offsets = self._sections['posting_offsets']
+            return [self.recipe(r) for r in self._sections['postings'][offsets[i]:offsets[i + 1]]]
+        return extras[field]
+
+    def _extras(self, i: int) -> Dict[str, Any]:
+        offsets = self._sections['extra_offsets']
+        return json.loads(bytes(self._sections['extras'][offsets[i]:offsets[i + 1]]))
+
+    def recipe(self, r: int) -> Dict[str, Any]:
+        """Recipe reference for a recipe id"""
+        offsets = self._sections['recipe_title_offsets']
+        return {
+            'title': str(self._sections['recipe_titles'][offsets[r]:offsets[r + 1]], 'utf-8'),
+            'category': self.recipe_categories[self._sections['recipe_category'][r]] or None
+        }
+
+    def project(self, name: str, fields: Iterable[str]) -> Dict[str, Any]:
+        i = self.lookup(name)
+        fields = list(fields)
+        extras = None
+        if any(field not in CORE_FIELDS for field in fields):
+            extras = self._extras(i)
+        projected = {'ingredient': name}
+        for field in fields:
+            if field in CORE_FIELDS or field in extras:
+                projected[field] = self._field(i, field, extras)
+        return projected
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        i = self.lookup(name)
+        if i is None:
+            return None
+        return self.project(name, [*CORE_FIELDS, *self._extras(i)])
+
+
+class IndexSnapshot(NamedTuple):
+    index: MmapIngredientIndex
+    etag: str
+    mtime_ns: int
+    size: int
+
+
+class MmapIndexCache(DatasetCache):
+    """DatasetCache for the mmap index file; snapshots share the file's pages"""
+
+    def load(self, st: os.stat_result) -> IndexSnapshot:
+        index = MmapIngredientIndex(self.path)
+        return IndexSnapshot(index, index.version, st.st_mtime_ns, st.st_size)
+
+    def source_changed(self, snapshot: IndexSnapshot) -> bool:
+        """Whether the JSON a snapshot was built from now differs on disk (a missing JSON doesn't)"""
+        source = snapshot.index.source
+        if source is None:
+            return False
+        try:
+            st = os.stat(os.path.join(os.path.dirname(self.path), source['file']))
+        except FileNotFoundError:
+            return False
+        return (st.st_size, st.st_mtime_ns) != (source['size'], source['mtime_ns'])
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Search trigrams must be computed exactly as the API computes them, and the
+# file format is the one the API's reader defines
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ingredient_index import gram_postings
+from mmap_index import CORE_FIELDS, MAGIC
+
+
+def _strings(values: List[str]) -> Tuple[bytes, array]:
+    """Concatenate strings as UTF-8 with an offsets array (n + 1 entries)"""
+    blob, offsets = bytearray(), array('q', [0])
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def _postings(lists: List[List[int]]) -> Tuple[array, array]:
+    """Flatten integer lists into one array with an offsets array (n + 1 entries)"""
+    flat, offsets = array('i'), array('q', [0])
+    for values in lists:
+        flat.extend(values)
+        offsets.append(len(flat))
+    return flat, offsets
+
+
+def source_stamp(source_path: str, output_path: str) -> Dict[str, Any]:
+    """Location (relative to the index) plus size and mtime of the JSON an index is built from"""
+    st = os.stat(source_path)
+    return {
+        'file': os.path.relpath(source_path, os.path.dirname(os.path.abspath(output_path))),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns
+    }
+
+
+def build_index(processed: Dict[str, Any], source: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Serialize processed ingredient data into the read-only index format.
+
+    Ingredients are numbered in name order. Names, recipe titles and
+    extra fields are UTF-8 blobs with offset arrays; counts, the count
+    ranking, recipe postings, category postings and search trigram
+    postings are int arrays. A JSON header lists where each section
+    starts so readers can mmap the file and slice sections without
+    parsing them. `source` identifies the JSON file the data was read
+    from, so readers can tell when the index no longer matches it.
+    """
+    ingredients = processed['ingredients']
+    names = sorted(ingredients)
+
+    recipe_pairs = sorted({(recipe['title'], recipe['category'] or '')
+                           for data in ingredients.values() for recipe in data['recipes']})
+    recipe_ids = {pair: i for i, pair in enumerate(recipe_pairs)}
+    recipe_categories = sorted({category for _, category in recipe_pairs})
+    ingredient_categories = sorted({category for data in ingredients.values() for category in data['categories']})
+    recipe_category_ids = {category: i for i, category in enumerate(recipe_categories)}
+    ingredient_category_ids = {category: i for i, category in enumerate(ingredient_categories)}
+
+    by_count = sorted(range(len(names)), key=lambda i: (-ingredients[names[i]]['count'], names[i]))
+    by_category = {category: [] for category in ingredient_categories}
+    for i in by_count:
+        for category in ingredients[names[i]]['categories']:
+            by_category[category].append(i)
+
+    grams = gram_postings(names)
+    gram_names = sorted(grams)
+
+    name_blob, name_offsets = _strings(names)
+    gram_blob, gram_offsets = _strings(gram_names)
+    gram_members, gram_member_offsets = _postings([grams[gram] for gram in gram_names])
+    title_blob, title_offsets = _strings([title for title, _ in recipe_pairs])
+    extra_blob, extra_offsets = _strings([
+        json.dumps({k: v for k, v in ingredients[name].items() if k not in CORE_FIELDS},
+                   ensure_ascii=False, separators=(',', ':'))
+        for name in names
+    ])
+    postings, posting_offsets = _postings([
+        [recipe_ids[(recipe['title'], recipe['category'] or '')] for recipe in ingredients[name]['recipes']]
+        for name in names
+    ])
+    categories, category_offsets = _postings([
+        [ingredient_category_ids[category] for category in ingredients[name]['categories']]
+        for name in names
+    ])
+    category_members, category_member_offsets = _postings([by_category[c] for c in ingredient_categories])
+
+    sections = {
+        'names': name_blob,
+        'name_offsets': name_offsets,
+        'count': array('i', [ingredients[name]['count'] for name in names]),
+        'by_count': array('i', by_count),
+        'postings': postings,
+        'posting_offsets': posting_offsets,
+        'categories': categories,
+        'category_offsets': category_offsets,
+        'by_category': category_members,
+        'by_category_offsets': category_member_offsets,
+        'recipe_titles': title_blob,
+        'recipe_title_offsets': title_offsets,
+        'recipe_category': array('i', [recipe_category_ids[category] for _, category in recipe_pairs]),
+        'extras': extra_blob,
+        'extra_offsets': extra_offsets,
+        'grams': gram_blob,
+        'gram_offsets': gram_offsets,
+        'gram_postings': gram_members,
+        'gram_posting_offsets': gram_member_offsets
+    }
+
+    # Sections are 8-byte aligned relative to the start of the data area
+    body, table, digest = bytearray(), {}, hashlib.sha256()
+    for name, section in sections.items():
+        raw = section.tobytes() if isinstance(section, array) else section
+        body += b'\0' * (-len(body) % 8)
+        table[name] = [len(body), len(raw), section.typecode if isinstance(section, array) else 'B']
+        body += raw
+        digest.update(raw)
+
+    header = json.dumps({
+        'version': digest.hexdigest()[:32],
+        'byteorder': sys.byteorder,
+        'ingredients': len(names),
+        'recipes': len(recipe_pairs),
+        'recipe_categories': recipe_categories,
+        'ingredient_categories': ingredient_categories,
+        'sections': table,
+        'source': source
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % 8)
+    return MAGIC + struct.pack('<Q', len(header)) + header + bytes(body)
+
+
+def save_index(processed: Dict[str, Any], output_path: str = 'data/ingredients.idx',
+               source_path: Optional[str] = None) -> None:
+    """
+    Write the index atomically so processes that have it mapped keep the old version.
+
+    `processed` must already be saved to `source_path` (by default
+    processed_ingredients.json next to the index), whose size and mtime
+    are recorded in the header.
+    """
+    if source_path is None:
+        source_path = os.path.join(os.path.dirname(output_path), 'processed_ingredients.json')
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(build_index(processed, source_stamp(source_path, output_path)))
+    os.replace(tmp_path, output_path)
+    print(f"Saved ingredient index ({len(processed['ingredients'])} ingredients) to {output_path}")
+
+
+if __name__ == '__main__':
+    # Rebuild the index from an existing processed data file
+    with open(os.path.join('data', 'processed_ingredients.json'), 'r', encoding='utf-8') as f:
+        processed = json.load(f)
+    save_index(processed)
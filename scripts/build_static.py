@@ -1,15 +1,49 @@
 import os
+import sys
+import gzip
 import shutil
 import json
 from pathlib import Path
 
+from compact_format import save_compact
+from cooccurrence import save_cooccurrence
+from recipe_graph import save_recipe_graph
+from static_shards import ShardWriter, build_shards, manifest_files
+
+# The static build reuses the query code that backs the Flask API
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ingredient_index import CooccurrenceIndex, GraphIndex, IngredientIndex, heatmap
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz siblings are written
+    brotli = None
+
+def write_compressed_siblings(path: Path) -> None:
+    """Write pre-compressed .gz and .br copies next to a build file"""
+    body = path.read_bytes()
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(body, quality=11))
+
+def is_stale(path: Path, source: Path) -> bool:
+    """Whether a derived data file is missing or older than the data it was built from"""
+    return not path.exists() or path.stat().st_mtime_ns < source.stat().st_mtime_ns
+
 def build_static():
     """Build static files for GitHub Pages deployment"""
-    # Create build directory
+    # Create build directory, keeping earlier shards so unchanged ones aren't rewritten
     build_dir = Path('build')
+    shard_dir = build_dir / 'data' / 'shards'
     if build_dir.exists():
-        shutil.rmtree(build_dir)
-    build_dir.mkdir()
+        for path in list(build_dir.iterdir()) + list((build_dir / 'data').glob('*')):
+            if path in (build_dir / 'data', shard_dir):
+                continue
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+    build_dir.mkdir(exist_ok=True)
 
     # Copy static assets
     shutil.copytree('static', build_dir / 'static')
@@ -82,6 +116,41 @@ def build_static():
             json.dump(sample_data, f, indent=2)
         shutil.copy2(source_data, data_dir / 'processed_ingredients.json')
 
+    write_compressed_siblings(data_dir / 'processed_ingredients.json')
+
+    with open(source_data, 'r', encoding='utf-8') as f:
+        processed = json.load(f)
+
+    # Interned variant, matching /api/recipes?format=compact
+    compact_file = data_dir / 'processed_ingredients.compact.json'
+    save_compact(processed, str(compact_file))
+    write_compressed_siblings(compact_file)
+
+    # Precomputed heatmap matrix, matching /api/cooccurrence?k=15; the co-occurrence and
+    # graph files are rebuilt when older than the processed data, so shards never go stale
+    index = IngredientIndex(processed)
+    cooccurrence_file = Path('data/cooccurrence.json')
+    if is_stale(cooccurrence_file, source_data):
+        save_cooccurrence(processed['ingredients'], str(cooccurrence_file))
+    with open(cooccurrence_file, 'r', encoding='utf-8') as f:
+        cooccurrence = CooccurrenceIndex(json.load(f))
+
+    # Pruned network graph, matching /api/graph?min_degree=2&top_k=300
+    graph_file = Path('data/recipe_graph.json')
+    if is_stale(graph_file, source_data):
+        save_recipe_graph(processed['ingredients'], str(graph_file))
+    with open(graph_file, 'r', encoding='utf-8') as f:
+        graph = GraphIndex(json.load(f))
+
+    # Per-view shards with content-hashed names, listed in a small manifest
+    writer = ShardWriter(data_dir, 'shards', on_write=write_compressed_siblings)
+    manifest = build_shards(processed, index.by_count, heatmap(index, cooccurrence, 15),
+                            graph.subgraph(min_degree=2, top_k=300), writer)
+    with open(data_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    removed = writer.prune(manifest_files(manifest))
+    print(f"Shards: {len(writer.written)} written, {len(writer.skipped)} unchanged, {len(removed)} removed")
+
     # Create index.html with proper paths
     with open('templates/index.html', 'r') as f:
         content = f.read()
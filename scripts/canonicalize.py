@@ -0,0 +1,131 @@
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, FrozenSet, List, Mapping, Optional
+
+# Minimum Jaccard similarity of core tokens for a name to join a cluster
+SIMILARITY_THRESHOLD = 0.7
+
+# Preparation, packaging and filler words that don't change what an ingredient is
+NOISE_WORDS = frozenset('''
+    a about an and any approx around as at bag ball bunch can cans chopped cold crushed cubed cut
+    deseeded diced drained extra few finely for fresh freshly from grated halved handful into
+    large lengthways little medium melted minced of or pack peeled pinch plus quartered rinsed
+    roughly serve serving shredded sliced slices small softened some tbsp the thinly tin tins to
+    torn trimmed tsp very warm with
+'''.split())
+
+
+def core_tokens(name: str) -> FrozenSet[str]:
+    """The words that identify an ingredient, lightly singularized"""
+    tokens = set()
+    for word in re.findall(r'[a-zà-ÿ]+', name.lower()):
+        if word in NOISE_WORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.add(word)
+    return frozenset(tokens)
+
+
+def _prefix_length(size: int, threshold: float) -> int:
+    # Two sets with Jaccard >= threshold must share a token among the first
+    # size - ceil(threshold * size) + 1 tokens of each, in a global order
+    return size - math.ceil(threshold * size) + 1
+
+
+def cluster_names(counts: Mapping[str, int], threshold: float = SIMILARITY_THRESHOLD) -> Dict[str, str]:
+    """
+    Map each name to the canonical name of its cluster.
+
+    Names are visited from most to least common; each joins the most
+    similar existing cluster leader with Jaccard similarity >= threshold,
+    or leads a new cluster, so clusters can't drift through chains of
+    small differences. Candidate leaders come from an inverted index over
+    each leader's rarest tokens (prefix filtering), which finds every
+    leader above the threshold without comparing all pairs. The shortest
+    name in a cluster, usually the one without preparation notes, is its
+    canonical name.
+    """
+    tokens = {name: core_tokens(name) for name in counts}
+    frequency = Counter(token for name_tokens in tokens.values() for token in name_tokens)
+
+    def ordered(name_tokens: FrozenSet[str]) -> List[str]:
+        return sorted(name_tokens, key=lambda token: (frequency[token], token))
+
+    leader_of: Dict[str, str] = {}
+    leaders: Dict[str, List[str]] = {}
+    for name in sorted(counts, key=lambda name: (-counts[name], len(name), name)):
+        name_tokens = tokens[name]
+        if not name_tokens:
+            leader_of[name] = name
+            continue
+        order = ordered(name_tokens)
+
+        best, best_similarity = None, threshold
+        seen = set()
+        for token in order[:_prefix_length(len(order), threshold)]:
+            for leader in leaders.get(token, ()):
+                if leader in seen:
+                    continue
+                seen.add(leader)
+                leader_tokens = tokens[leader]
+                similarity = len(name_tokens & leader_tokens) / len(name_tokens | leader_tokens)
+                if similarity >= best_similarity and (best is None or similarity > best_similarity):
+                    best, best_similarity = leader, similarity
+
+        if best is None:
+            leader_of[name] = name
+            for token in order[:_prefix_length(len(order), threshold)]:
+                leaders.setdefault(token, []).append(name)
+        else:
+            leader_of[name] = best
+
+    members: Dict[str, List[str]] = {}
+    for name, leader in leader_of.items():
+        members.setdefault(leader, []).append(name)
+    canonical = {}
+    for names in members.values():
+        target = min(names, key=lambda name: (len(name), -counts[name], name))
+        for name in names:
+            canonical[name] = target
+    return canonical
+
+
+def build_aliases(counts: Mapping[str, int], threshold: float = SIMILARITY_THRESHOLD) -> Dict[str, str]:
+    """Cluster names and report the result; returns only names whose canonical differs"""
+    start = time.perf_counter()
+    canonical = cluster_names(counts, threshold)
+    aliases = {name: target for name, target in canonical.items() if name != target}
+    clusters = len(set(canonical.values()))
+    print(f"Canonicalized {len(counts)} ingredient names into {clusters} clusters "
+          f"({len(aliases)} aliases) in {time.perf_counter() - start:.3f}s")
+    return aliases
+
+
+def aliases_digest(aliases: Mapping[str, str]) -> str:
+    """Identifies an alias map, so state built with another map can be detected"""
+    body = json.dumps(sorted(aliases.items()), ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]
+
+
+def save_aliases(aliases: Dict[str, str], path: str, threshold: float = SIMILARITY_THRESHOLD) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'threshold': threshold, 'aliases': dict(sorted(aliases.items()))}, f,
+                  ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    print(f"Saved {len(aliases)} ingredient aliases to {path}")
+
+
+def load_aliases(path: str) -> Optional[Dict[str, str]]:
+    """The persisted alias -> canonical map, or None if none has been built"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['aliases']
+    except FileNotFoundError:
+        return None
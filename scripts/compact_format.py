@@ -0,0 +1,114 @@
+import json
+import os
+from typing import Any, Dict, List
+
+# Version tag checked by decoders
+COMPACT_FORMAT = 'compact-v1'
+
+
+def build_compact(processed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Encode processed ingredient data with interned tables and integer postings.
+
+    Recipe (title, category) pairs and category names are stored once each,
+    ingredient fields are stored as parallel arrays, and every reference
+    (recipe postings, categories, the most-common ranking) is an index into
+    one of those tables. decode_compact() restores the original structure.
+    """
+    ingredients = processed['ingredients']
+    names = list(ingredients)
+
+    recipe_pairs = sorted({(recipe['title'], recipe['category'] or '')
+                           for data in ingredients.values() for recipe in data['recipes']})
+    recipe_categories = sorted({category for _, category in recipe_pairs})
+    ingredient_categories = sorted({category for data in ingredients.values() for category in data['categories']})
+    recipe_ids = {pair: i for i, pair in enumerate(recipe_pairs)}
+    recipe_category_ids = {category: i for i, category in enumerate(recipe_categories)}
+    ingredient_category_ids = {category: i for i, category in enumerate(ingredient_categories)}
+    name_ids = {name: i for i, name in enumerate(names)}
+
+    columns = {
+        'names': names,
+        'count': [ingredients[name]['count'] for name in names],
+        'recipes': [[recipe_ids[(recipe['title'], recipe['category'] or '')] for recipe in ingredients[name]['recipes']]
+                    for name in names],
+        'categories': [[ingredient_category_ids[category] for category in ingredients[name]['categories']]
+                       for name in names]
+    }
+    # Parser output (scripts/process_ingredients.py) carries quantity and unit counts too
+    for field in ('common_quantities', 'common_units'):
+        if any(field in data for data in ingredients.values()):
+            columns[field] = [ingredients[name].get(field, {}) for name in names]
+
+    stats = dict(processed.get('stats', {}))
+    if 'most_common_ingredients' in stats:
+        stats['most_common_ingredients'] = [name_ids[item['ingredient']]
+                                            for item in stats['most_common_ingredients']]
+
+    return {
+        'format': COMPACT_FORMAT,
+        'recipes': {
+            'titles': [title for title, _ in recipe_pairs],
+            'categories': [recipe_category_ids[category] for _, category in recipe_pairs]
+        },
+        'recipe_categories': recipe_categories,
+        'ingredient_categories': ingredient_categories,
+        'ingredients': columns,
+        'stats': stats
+    }
+
+
+def decode_compact(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand compact data back into the processed_ingredients.json structure"""
+    if compact.get('format') != COMPACT_FORMAT:
+        raise ValueError(f"Unsupported format: {compact.get('format')}")
+
+    recipe_categories = compact['recipe_categories']
+    recipes = [{'title': title, 'category': recipe_categories[category] or None}
+               for title, category in zip(compact['recipes']['titles'], compact['recipes']['categories'])]
+    ingredient_categories = compact['ingredient_categories']
+    columns = compact['ingredients']
+    extra_fields = [field for field in ('common_quantities', 'common_units') if field in columns]
+
+    ingredients: Dict[str, Dict[str, Any]] = {}
+    for i, name in enumerate(columns['names']):
+        ingredients[name] = {
+            'count': columns['count'][i],
+            'recipes': [dict(recipes[r]) for r in columns['recipes'][i]],
+            'categories': [ingredient_categories[c] for c in columns['categories'][i]]
+        }
+        for field in extra_fields:
+            ingredients[name][field] = columns[field][i]
+
+    stats = dict(compact['stats'])
+    if 'most_common_ingredients' in stats:
+        most_common: List[Dict[str, Any]] = []
+        for i in stats['most_common_ingredients']:
+            name = columns['names'][i]
+            most_common.append({
+                'ingredient': name,
+                'count': ingredients[name]['count'],
+                'categories': list(ingredients[name]['categories'])
+            })
+        stats['most_common_ingredients'] = most_common
+
+    return {'ingredients': ingredients, 'stats': stats}
+
+
+def save_compact(processed: Dict[str, Any],
+                 output_path: str = 'data/processed_ingredients.compact.json') -> None:
+    """Write the compact encoding of processed data as minified JSON"""
+    compact = build_compact(processed)
+    # Written atomically, since a running server reloads the file when it changes
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(compact, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, output_path)
+    print(f"Saved compact data ({len(compact['recipes']['titles'])} interned recipes) to {output_path}")
+
+
+if __name__ == '__main__':
+    # Rebuild the compact file from an existing processed data file
+    with open(os.path.join('data', 'processed_ingredients.json'), 'r', encoding='utf-8') as f:
+        processed = json.load(f)
+    save_compact(processed)
@@ -0,0 +1,70 @@
+import json
+import os
+from typing import Any, Dict
+
+import numpy as np
+
+
+def build_cooccurrence(ingredient_data: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a sparse ingredient x ingredient co-occurrence matrix.
+
+    Recipes are identified by title, matching how the dashboard counts
+    shared recipes. The matrix is the product B^T B of the recipe x
+    ingredient incidence matrix B, computed in COO form with NumPy and
+    stored as its strict upper triangle.
+    """
+    names = sorted(ingredient_data)
+    recipe_ids: Dict[str, int] = {}
+    ing_col, rec_col = [], []
+    for ing_id, name in enumerate(names):
+        for recipe in ingredient_data[name]['recipes']:
+            ing_col.append(ing_id)
+            rec_col.append(recipe_ids.setdefault(recipe['title'], len(recipe_ids)))
+
+    n = len(names)
+    if not ing_col:
+        return {'ingredients': names, 'recipes': len(recipe_ids), 'pairs': []}
+
+    # Unique incidence entries, grouped by recipe
+    entries = np.unique(np.array(rec_col, dtype=np.int64) * n + np.array(ing_col, dtype=np.int64))
+    rec = entries // n
+    ing = entries % n
+
+    # For every entry, pair it with each entry of the same recipe (B^T B)
+    _, group_start, group_size = np.unique(rec, return_index=True, return_counts=True)
+    entry_start = np.repeat(group_start, group_size)
+    entry_size = np.repeat(group_size, group_size)
+    left = np.repeat(np.arange(len(entries)), entry_size)
+    block_offset = np.repeat(np.cumsum(entry_size) - entry_size, entry_size)
+    right = np.repeat(entry_start, entry_size) + (np.arange(len(left)) - block_offset)
+
+    a, b = ing[left], ing[right]
+    upper = a < b
+    keys, counts = np.unique(a[upper] * n + b[upper], return_counts=True)
+
+    pairs = np.stack([keys // n, keys % n, counts], axis=1)
+    return {
+        'ingredients': names,
+        'recipes': len(recipe_ids),
+        'pairs': pairs.tolist()
+    }
+
+
+def save_cooccurrence(ingredient_data: Dict[str, Dict[str, Any]],
+                      output_path: str = 'data/cooccurrence.json') -> None:
+    """Build the co-occurrence matrix and write it next to the processed data"""
+    matrix = build_cooccurrence(ingredient_data)
+    # Written atomically, since a running server reloads the file when it changes
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(matrix, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, output_path)
+    print(f"Saved co-occurrence matrix ({len(matrix['pairs'])} pairs) to {output_path}")
+
+
+if __name__ == '__main__':
+    # Rebuild the matrix from an existing processed data file
+    with open(os.path.join('data', 'processed_ingredients.json'), 'r', encoding='utf-8') as f:
+        processed = json.load(f)
+    save_cooccurrence(processed['ingredients'])
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import unicodedata
+from typing import Any, Dict
+from urllib.parse import urlsplit, urlunsplit
+
+# Stored with incremental state; bump when fingerprints or duplicate detection change so aggregates are rebuilt
+FINGERPRINT_VERSION = 2
+
+
+def normalize_text(value: Any) -> str:
+    """Unicode-normalized, casefolded text with whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFKC', str(value or '')).casefold().split())
+
+
+def normalize_url(url: str) -> str:
+    """URL without its fragment or trailing slash, with the scheme and host lowercased"""
+    parts = urlsplit((url or '').strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+
+
+def _digest(value: Any) -> str:
+    body = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]
+
+
+def content_hash(recipe: Dict[str, Any]) -> str:
+    """Hash of a recipe's title, ingredients and instructions, ignoring case, spacing and scrape metadata"""
+    return _digest([
+        normalize_text(recipe.get('title')),
+        [normalize_text(ingredient) for ingredient in recipe.get('ingredients') or []],
+        normalize_text(recipe.get('instructions'))
+    ])
+
+
+def source_key(recipe: Dict[str, Any]) -> str:
+    """Identifies where a recipe was scraped from (category and URL), or '' if it has no URL"""
+    if not recipe.get('url'):
+        return ''
+    return _digest([recipe.get('category') or '', normalize_url(recipe['url'])])[:16]
+
+
+def recipe_fingerprint(recipe: Dict[str, Any]) -> str:
+    """
+    Identity of a recipe record: its source plus its normalized content.
+
+    Re-scraping an unchanged page yields the same fingerprint, while the
+    same page listed under another category, or a page whose content
+    changed, does not.
+    """
+    return _digest([source_key(recipe), content_hash(recipe)])
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import unquote
+
+
+def fixture_url(name: str) -> str:
+    """
+    URL of a saved page from its file name without .html: the percent-encoded
+    URL (e.g. https%3A%2F%2Fexample.com%2Fpancakes), with https:// assumed
+    when the name has no scheme
+    """
+    url = unquote(name)
+    return url if '://' in url else f'https://{url}'
+
+
+def content_hash(html: str) -> str:
+    """Digest of a page body, to tell a re-sent but unchanged page from a changed one"""
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of fetched recipe pages, keyed by URL.
+
+    Each entry keeps the page body and its hash, its ETag and
+    Last-Modified validators, and the fields parsed from it, so an
+    unchanged page needs neither a full download nor a re-parse. Servers
+    that send no validators still resend the body, and the hash lets an
+    identical one skip the re-parse.
+    """
+
+    def __init__(self, cache_dir: str = 'data/http_cache'):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{key}{suffix}')
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a URL, if any"""
+        try:
+            with open(self._path(url, '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def body(self, url: str) -> Optional[str]:
+        """Return the cached page body for a URL, if any"""
+        try:
+            with open(self._path(url, '.html'), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def saved_pages(self) -> Iterator[Tuple[str, str]]:
+        """
+        (URL, body path) of every page saved in the directory.
+
+        Besides cache entries this covers bare .html files, such as saved
+        fixtures. Their URL comes from a <name>.json sidecar with a "url"
+        key when there is one, else from the file name (see fixture_url).
+        """
+        for name in sorted(os.listdir(self.cache_dir)):
+            if not name.endswith('.html'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            url = None
+            try:
+                with open(path[:-len('.html')] + '.json', 'r', encoding='utf-8') as f:
+                    url = json.load(f).get('url')
+            except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+                pass
+            yield url or fixture_url(name[:-len('.html')]), path
+
+    def unchanged(self, entry: Optional[Dict[str, Any]], html: str) -> bool:
+        """Whether a freshly downloaded body is the one a cached entry was parsed from"""
+        if not entry:
+            return False
+        if entry.get('body_hash'):
+            return entry['body_hash'] == content_hash(html)
+        # Entries cached before bodies were hashed
+        return self.body(entry['url']) == html
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Revalidation headers for a cached entry"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str],
+            parsed: Dict[str, Any]) -> None:
+        """Store a freshly fetched page and the fields parsed from it"""
+        self._write(self._path(url, '.html'), html)
+        self._write(self._path(url, '.json'), json.dumps({
+            'url': url,
+            'body_hash': content_hash(html),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': datetime.now().isoformat(),
+            'parsed': parsed
+        }, ensure_ascii=False))
+
+    def update_parsed(self, url: str, parsed: Dict[str, Any]) -> None:
+        """Replace the parsed fields of a cached entry, keeping its body and validators"""
+        entry = self.get(url)
+        if entry is not None:
+            entry['parsed'] = parsed
+            self._write(self._path(url, '.json'), json.dumps(entry, ensure_ascii=False))
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+
+class Changes(NamedTuple):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: List[str]
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Fingerprints (size, mtime and content hash) of the recipe files whose
+    contributions are persisted.
+    """
+
+    def __init__(self, files: Dict[str, Dict[str, Any]] = None):
+        self.files = files or {}
+
+    def scan(self, data_dir: str, names: Iterable[str]) -> Changes:
+        """
+        Compare the files in data_dir against the manifest.
+
+        Size and mtime are checked first; a file is only hashed when they
+        differ, and counts as changed only if its content hash differs.
+        The manifest itself is updated to describe the scanned files.
+        """
+        added, changed, unchanged = [], [], []
+        seen = set()
+        for name in sorted(names):
+            seen.add(name)
+            path = os.path.join(data_dir, name)
+            st = os.stat(path)
+            entry = self.files.get(name)
+            if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+                unchanged.append(name)
+                continue
+
+            sha256 = file_hash(path)
+            if entry is None:
+                added.append(name)
+            elif entry['sha256'] != sha256:
+                changed.append(name)
+            else:
+                unchanged.append(name)
+            self.files[name] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha256}
+
+        removed = sorted(name for name in self.files if name not in seen)
+        for name in removed:
+            del self.files[name]
+        return Changes(added, changed, removed, unchanged)
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    """Load persisted incremental state, or an empty state on first run"""
+    if not os.path.exists(path):
+        return {'manifest': {}, 'contributions': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    """Atomically replace the persisted incremental state"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
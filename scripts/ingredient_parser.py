@@ -0,0 +1,113 @@
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Stored with incremental state; bump when parsing changes so old lines are re-parsed
+PARSER_VERSION = 3
+
+# Single-character vulgar fractions, e.g. ½ -> 0.5
+UNICODE_FRACTIONS = {ch: unicodedata.numeric(ch) for ch in '¼½¾⅐⅑⅒⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞'}
+_FRACTION_CHARS = ''.join(UNICODE_FRACTIONS)
+
+# A whole number optionally followed by a fraction ("1 1/2", "1-1/2", "1½", "1/2",
+# "1.5"), or a lone unicode or decimal fraction; groups are unpacked in
+# parse_quantities. Ranges ("1-2") are two quantities
+QUANTITY_PATTERN = re.compile(
+    rf'(\d+)(?:\s*([{_FRACTION_CHARS}])|(?:\s+|-)(\d+)/(\d+)|/(\d+)|(\.\d+))?'
+    rf'|([{_FRACTION_CHARS}])|(\.\d+)'
+)
+
+# Tokens that are only a quantity or a range of them ("1-1/2", "2–3"), and so
+# aren't part of the ingredient name
+_QUANTITY = rf'(?:\d+(?:[/.]\d+)?|\.\d+|\d*[{_FRACTION_CHARS}])'
+QUANTITY_TOKEN = re.compile(rf'^{_QUANTITY}(?:[-–]{_QUANTITY})?$')
+
+
+class ParsedLine(NamedTuple):
+    quantities: tuple
+    units: tuple
+    categories: tuple
+    main_ingredient: str
+
+
+def format_quantity(value: float) -> str:
+    """Quantities as aggregate keys: integers without a decimal point, others to 3 places"""
+    if value.is_integer():
+        return str(int(value))
+    return f'{value:.3f}'.rstrip('0')
+
+
+def parse_quantities(text: str) -> List[float]:
+    """Every quantity in a line, with mixed ("1 1/2") and unicode ("1½") fractions as one value"""
+    quantities = []
+    for whole, vulgar, num, den, over, decimal, lone_vulgar, lone_decimal in QUANTITY_PATTERN.findall(text):
+        if lone_vulgar:
+            quantities.append(UNICODE_FRACTIONS[lone_vulgar])
+        elif lone_decimal:
+            quantities.append(float(lone_decimal))
+        elif vulgar:
+            quantities.append(int(whole) + UNICODE_FRACTIONS[vulgar])
+        elif den:
+            quantities.append(int(whole) + int(num) / int(den) if int(den) else float(whole))
+        elif over:
+            if int(over):
+                quantities.append(int(whole) / int(over))
+        elif decimal:
+            quantities.append(float(whole + decimal))
+        else:
+            quantities.append(float(whole))
+    return quantities
+
+
+class IngredientLineParser:
+    """
+    Parses tokenized ingredient lines into quantities, units, categories and a name.
+
+    Units and category terms are compiled into one table from token to
+    (is_unit, categories), so a line's units and categories are found in a
+    single pass over its tokens instead of a set scan per category.
+    """
+
+    def __init__(self, units: Iterable[str], categories: Dict[str, Iterable[str]]):
+        self.units = set(units)
+        self.category_order = list(categories)
+        table: Dict[str, Tuple[bool, Set[str]]] = {unit: (True, set()) for unit in self.units}
+        for category, terms in categories.items():
+            for term in terms:
+                table.setdefault(term, (term in self.units, set()))[1].add(category)
+        self.terms = {
+            term: (is_unit, tuple(c for c in self.category_order if c in term_categories))
+            for term, (is_unit, term_categories) in table.items()
+        }
+        self._rank = {category: i for i, category in enumerate(self.category_order)}
+
+    def match(self, words: List[str]) -> Tuple[List[str], List[str]]:
+        """Units in token order, and categories in definition order ('other' if none)"""
+        units, categories = [], set()
+        terms = self.terms
+        for word in words:
+            entry = terms.get(word)
+            if entry is not None:
+                if entry[0]:
+                    units.append(word)
+                categories.update(entry[1])
+        return units, sorted(categories, key=self._rank.__getitem__) or ['other']
+
+    def name_words(self, words: List[str], stop_words: Set[str]) -> List[str]:
+        """Tokens left once quantities, units and stop words are removed"""
+        return [word for word in words
+                if word not in stop_words and word not in self.units and not QUANTITY_TOKEN.match(word)]
+
+    def parse(self, text: str, words: List[str], stop_words: Set[str],
+              lemmatize: Optional[Callable[[str], str]] = None) -> ParsedLine:
+        """Parse a lowercased line and its tokens into one record"""
+        units, categories = self.match(words)
+        name_words = self.name_words(words, stop_words)
+        if lemmatize is not None:
+            name_words = [lemmatize(word) for word in name_words]
+        return ParsedLine(
+            tuple(format_quantity(q) for q in parse_quantities(text)),
+            tuple(units),
+            tuple(categories),
+            ' '.join(name_words)
+        )
@@ -0,0 +1,61 @@
+from itertools import chain
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def top_k_indices(counts: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """
+    Indices of the k largest counts in descending order, ties kept in
+    their original order, as a stable sort would; all indices if k is None
+    """
+    n = len(counts)
+    # Unique keys, smallest first: higher counts, then earlier positions
+    keys = -counts * n + np.arange(n, dtype=np.int64)
+    if k is None or k >= n:
+        return np.argsort(keys)
+    top = np.argpartition(keys, k)[:k]
+    return top[np.argsort(keys[top])]
+
+
+def ingredient_stats(ingredients_data: Dict[str, Dict[str, Any]], total_recipes: int,
+                     top_k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Summary statistics over ingredient aggregates.
+
+    Counts, categories and units are flattened into columns once and
+    reduced with pandas; every ingredient is ranked unless top_k limits
+    most_common_ingredients. ingredients_by_category counts distinct
+    ingredients per category and category_distribution counts ingredient
+    lines per category. Category and unit totals keep first-appearance order.
+    """
+    names = list(ingredients_data)
+    values = list(ingredients_data.values())
+    counts = np.fromiter((data['count'] for data in values), dtype=np.int64, count=len(values))
+
+    # One row per (ingredient, category) and per (ingredient, unit)
+    category_items = list(chain.from_iterable(sorted(data['categories'].items()) for data in values))
+    category_names = [category for category, _ in category_items]
+    categories = pd.Series(category_names, dtype=object)
+    category_lines = pd.Series([lines for _, lines in category_items],
+                               index=pd.Index(category_names, dtype=object), dtype=np.int64)
+    units = pd.Series(list(chain.from_iterable(data['common_units'].values() for data in values)),
+                      index=pd.Index(list(chain.from_iterable(data['common_units'] for data in values)), dtype=object),
+                      dtype=np.int64)
+
+    return {
+        'total_ingredients': len(names),
+        'total_recipes': total_recipes,
+        'ingredients_by_category': {k: int(v) for k, v in categories.value_counts(sort=False).items()},
+        'most_common_ingredients': [
+            {
+                'ingredient': names[i],
+                'count': int(counts[i]),
+                'categories': sorted(values[i]['categories'])
+            }
+            for i in top_k_indices(counts, top_k)
+        ],
+        'most_common_units': {k: int(v) for k, v in units.groupby(level=0, sort=False).sum().items()},
+        'category_distribution': {k: int(v) for k, v in category_lines.groupby(level=0, sort=False).sum().items()}
+    }
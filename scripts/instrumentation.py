@@ -0,0 +1,111 @@
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is reported as None
+    resource = None
+
+
+def peak_rss_kb() -> Dict[str, Optional[int]]:
+    """Peak resident set size of this process and of its finished children (kilobytes on Linux)"""
+    if resource is None:
+        return {'self': None, 'children': None}
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+
+class StageTimer:
+    """
+    Accumulates wall time, CPU time and item counts per named pipeline stage.
+
+    Stages may nest or repeat; each use adds to the stage's totals. Stages
+    recorded in worker processes can be merged in, in which case their
+    times are summed across processes.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, wall: float = 0.0, cpu: float = 0.0, items: int = 0) -> None:
+        stage = self.stages.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'items': 0})
+        stage['wall_s'] += wall
+        stage['cpu_s'] += cpu
+        stage['items'] += items
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[None]:
+        """Time the body of a with block as one use of a stage"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, items)
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Yield from an iterable, charging the time spent producing each item to a stage"""
+        iterator = iter(iterable)
+        while True:
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, 1)
+            yield item
+
+    def merge(self, stages: Dict[str, Dict[str, float]]) -> None:
+        """Add stage totals recorded elsewhere, e.g. in a worker process"""
+        for name, stage in stages.items():
+            self.add(name, stage['wall_s'], stage['cpu_s'], stage['items'])
+
+    def reset(self) -> None:
+        self.stages = {}
+
+    def summary(self) -> Dict[str, Any]:
+        """Stage totals with throughput, plus peak RSS"""
+        return {
+            'stages': {
+                name: {**stage, 'items_per_s': stage['items'] / stage['wall_s'] if stage['items'] and stage['wall_s'] else None}
+                for name, stage in self.stages.items()
+            },
+            'peak_rss_kb': peak_rss_kb()
+        }
+
+    def report(self) -> None:
+        """Print a table of stage timings"""
+        summary = self.summary()
+        print("\nStage timings:")
+        for name, stage in summary['stages'].items():
+            throughput = f", {stage['items']} items ({stage['items_per_s']:.0f}/s)" if stage['items_per_s'] else ''
+            print(f"- {name}: {stage['wall_s']:.3f}s wall, {stage['cpu_s']:.3f}s cpu{throughput}")
+        rss = summary['peak_rss_kb']
+        if rss['self'] is not None:
+            print(f"Peak RSS: {rss['self'] / 1024:.1f} MB (workers: {rss['children'] / 1024:.1f} MB)")
+
+    def save(self, path: str) -> None:
+        """Write the summary as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"Timing summary saved to {path}")
+
+
+@contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """Run the body under cProfile and dump pstats to `path`; a no-op when path is None"""
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile saved to {path} (inspect with: python -m pstats {path})")
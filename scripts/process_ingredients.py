@@ -1,33 +1,93 @@
+import argparse
 import json
 import os
-import re
-from typing import Dict, List, Any
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set
 from collections import defaultdict
-import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
+from build_index import save_index
+from canonicalize import aliases_digest, build_aliases, load_aliases, save_aliases
+from compact_format import save_compact
+from cooccurrence import save_cooccurrence
+from fingerprint import FINGERPRINT_VERSION
+from incremental import Manifest, load_state, save_state
+from ingredient_parser import PARSER_VERSION, IngredientLineParser, ParsedLine, format_quantity, parse_quantities
+from ingredient_stats import ingredient_stats
+from instrumentation import StageTimer, profiled
+from recipe_store import DERIVED_FILES, LegacyDuplicates, RecipeStore, record_identity
+from recipe_graph import save_recipe_graph
+from setup_nltk import TOKENIZER_RESOURCE, ensure_resources, load_tables
+
+# Bounds for the memo caches; ingredient lines repeat heavily across recipes
+LINE_CACHE_SIZE = 65536
+LEMMA_CACHE_SIZE = 16384
+
+# Recipes per parallel work unit
+SHARD_SIZE = 64
+
+# Alias map over this processor's lemmatized names, kept apart from
+# process_recipes.py's map since that script normalizes names differently
+ALIASES_FILE = 'lemma_aliases.json'
+
+def _empty_ingredient() -> Dict[str, Any]:
+    return {
+        'count': 0,
+        'recipes': [],
+        # Counted rather than a set, so per-shard aggregates can be summed
+        'categories': defaultdict(int),
+        'common_quantities': defaultdict(int),
+        'common_units': defaultdict(int)
+    }
+
+# Per-worker processor, created once by _init_worker so NLTK loads once per process
+_worker_processor = None
+
+def _init_worker(data_dir: str) -> None:
+    global _worker_processor
+    _worker_processor = IngredientProcessor(data_dir)
+
+def _process_shard(recipes: List[Dict[str, Any]]) -> tuple:
+    """Aggregate one shard of recipes inside a worker process"""
+    _worker_processor.ingredients_data = defaultdict(_empty_ingredient)
+    _worker_processor.timer.reset()
+    for recipe in recipes:
+        _worker_processor.process_recipe(recipe)
+    return (_worker_processor.export_aggregates(), os.getpid(), _worker_processor.cache_stats(),
+            _worker_processor.timer.stages)
+
 class IngredientProcessor:
     def __init__(self, data_dir: str = 'data'):
         self.data_dir = data_dir
         self.recipes = []
-        self.ingredients_data = defaultdict(lambda: {
-            'count': 0,
-            'recipes': [],
-            'categories': set(),
-            'common_quantities': defaultdict(int),
-            'common_units': defaultdict(int)
-        })
-        
-        # Download required NLTK data
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-        nltk.download('averaged_perceptron_tagger')
-        
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+        self.ingredients_data = defaultdict(_empty_ingredient)
+        # Set by incremental runs, which don't keep every recipe in memory
+        self.total_recipes = None
+        # Bumped on every change to ingredients_data; keys the stats cache
+        self.data_version = 0
+        self._stats_cache = None
+
+        # Stopwords and lemmas precompiled by setup_nltk.py, if present; NLTK's
+        # own corpora are only loaded for words the tables don't cover
+        tables = load_tables(data_dir) or {}
+        self.lemma_table = tables.get('lemmas', {})
+        self._stop_words = set(tables['stopwords']) if 'stopwords' in tables else None
+        self._lemmatizer = None
+
+        # Near-duplicate name -> canonical name, built by canonicalize()
+        self.aliases = load_aliases(os.path.join(data_dir, ALIASES_FILE)) or {}
+
+        # Memoized per instance so identical lines and words are parsed once
+        self.normalize_line = lru_cache(maxsize=LINE_CACHE_SIZE)(self._normalize_line)
+        self.lemmatize = lru_cache(maxsize=LEMMA_CACHE_SIZE)(self._lemmatize)
+        self.worker_cache_stats = {}
+        # Per-stage wall/CPU time and throughput, including merged worker stages
+        self.timer = StageTimer()
         
         # Common cooking units
         self.units = {
@@ -49,148 +109,387 @@ class IngredientProcessor:
             'nuts': {'almond', 'almonds', 'walnut', 'walnuts', 'pecan', 'pecans'},
             'liquids': {'water', 'oil', 'stock', 'wine', 'vinegar'}
         }
+        self.parser = IngredientLineParser(self.units, self.categories)
+
+    @property
+    def stop_words(self) -> Set[str]:
+        if self._stop_words is None:
+            ensure_resources('stopwords')
+            self._stop_words = set(stopwords.words('english'))
+        return self._stop_words
+
+    @property
+    def lemmatizer(self) -> WordNetLemmatizer:
+        if self._lemmatizer is None:
+            ensure_resources('wordnet')
+            self._lemmatizer = WordNetLemmatizer()
+        return self._lemmatizer
+
+    def _lemmatize(self, word: str) -> str:
+        lemma = self.lemma_table.get(word)
+        return lemma if lemma is not None else self.lemmatizer.lemmatize(word)
+
+    def tokenize(self, text: str) -> List[str]:
+        ensure_resources(TOKENIZER_RESOURCE)
+        return word_tokenize(text)
+
+    def recipe_files(self) -> List[str]:
+        """Names of the scraped recipe files in the data directory"""
+        return [filename for filename in sorted(os.listdir(self.data_dir))
+                if filename.endswith('.json') and filename not in DERIVED_FILES]
+
+    def load_recipe(self, filename: str) -> Dict[str, Any]:
+        """Load a single recipe file from the data directory"""
+        with open(os.path.join(self.data_dir, filename), 'r') as f:
+            return json.load(f)
+
+    def iter_recipes(self) -> Iterator[Dict[str, Any]]:
+        """Stream recipes from the recipe store, then any legacy per-recipe files that don't duplicate one"""
+        store = RecipeStore(self.data_dir)
+        yield from store
+        duplicates = LegacyDuplicates(store)
+        for filename in self.recipe_files():
+            recipe = self.load_recipe(filename)
+            if not duplicates.check(self.legacy_fingerprint(filename, recipe)):
+                yield recipe
+
+    @staticmethod
+    def legacy_fingerprint(filename: str, recipe: Dict[str, Any]) -> str:
+        """Fingerprint of a legacy recipe file, as migrating it into the store would compute"""
+        return record_identity(os.path.splitext(filename)[0], recipe)[0]
 
     def load_recipes(self) -> None:
-        """Load all recipe JSON files from the data directory"""
-        for filename in os.listdir(self.data_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(self.data_dir, filename), 'r') as f:
-                    recipe = json.load(f)
-                    self.recipes.append(recipe)
-
-    def extract_quantity_and_unit(self, ingredient: str) -> tuple:
+        """Load all recipes from the data directory"""
+        self.recipes.extend(self.iter_recipes())
+
+    def extract_quantity_and_unit(self, ingredient: str, words: Optional[List[str]] = None) -> tuple:
         """Extract quantity and unit from ingredient string"""
-        # Match common quantity patterns (numbers, fractions)
-        quantity_pattern = r'(\d+(?:/\d+)?|\d*\.\d+|\d+)'
-        quantities = re.findall(quantity_pattern, ingredient.lower())
-        
-        # Convert fractions to decimal
-        cleaned_quantities = []
-        for q in quantities:
-            if '/' in q:
-                num, denom = map(float, q.split('/'))
-                cleaned_quantities.append(str(num/denom))
-            else:
-                cleaned_quantities.append(q)
-        
-        # Find units
-        words = word_tokenize(ingredient.lower())
-        found_units = [word for word in words if word in self.units]
-        
-        return cleaned_quantities, found_units
+        if words is None:
+            words = self.tokenize(ingredient.lower())
+        quantities = [format_quantity(q) for q in parse_quantities(ingredient.lower())]
+        return quantities, self.parser.match(words)[0]
 
-    def categorize_ingredient(self, ingredient: str) -> List[str]:
+    def categorize_ingredient(self, ingredient: str, words: Optional[List[str]] = None) -> List[str]:
         """Categorize an ingredient into predefined categories"""
-        ingredient_words = set(word_tokenize(ingredient.lower()))
-        categories = []
+        if words is None:
+            words = self.tokenize(ingredient.lower())
+        return self.parser.match(words)[1]
+
+    def process_ingredients(self, workers: int = 1, recipes: Optional[Iterable[Dict[str, Any]]] = None) -> None:
+        """
+        Process all ingredients from loaded recipes, or from a recipe stream
+        such as iter_recipes() so the corpus is never held in memory
+        """
+        if recipes is None:
+            recipes = self.recipes
+        else:
+            self.total_recipes = 0
+
+        with self.timer.stage('process'):
+            recipes = self.timer.iterate('load', recipes)
+            if workers > 1:
+                self.process_ingredients_parallel(workers, recipes)
+                return
+
+            for recipe in recipes:
+                self.process_recipe(recipe)
+                if self.total_recipes is not None:
+                    self.total_recipes += 1
+
+    def process_ingredients_parallel(self, workers: int, recipes: Iterable[Dict[str, Any]]) -> None:
+        """
+        Shard recipes across a process pool and merge the partial aggregates.
+
+        Shards are contiguous and merged in order, so the result is the same
+        as a serial run. At most two shards per worker are in flight, which
+        bounds memory when recipes are streamed.
+        """
+        recipes = iter(recipes)
+        shards = iter(lambda: list(islice(recipes, SHARD_SIZE)), [])
+        pending = deque()
+
+        def merge_next():
+            partial, pid, cache_stats, stages = pending.popleft().result()
+            self.merge_aggregates(partial)
+            # Worker counters are cumulative, so keep the latest per process
+            self.worker_cache_stats[pid] = cache_stats
+            self.timer.merge(stages)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.data_dir,)) as executor:
+            for shard in shards:
+                pending.append(executor.submit(_process_shard, shard))
+                if self.total_recipes is not None:
+                    self.total_recipes += len(shard)
+                if len(pending) >= workers * 2:
+                    merge_next()
+            while pending:
+                merge_next()
+
+    def merge_aggregates(self, partial: Dict[str, Dict[str, Any]]) -> None:
+        """Add per-shard aggregates into this processor's ingredient data"""
+        self.data_version += 1
+        for ingredient, data in partial.items():
+            merged = self.ingredients_data[ingredient]
+            merged['count'] += data['count']
+            merged['recipes'].extend(data['recipes'])
+            for category, count in data['categories'].items():
+                merged['categories'][category] += count
+            for quantity, count in data['common_quantities'].items():
+                merged['common_quantities'][quantity] += count
+            for unit, count in data['common_units'].items():
+                merged['common_units'][unit] += count
+
+    def _normalize_line(self, ingredient: str) -> ParsedLine:
+        """Tokenize an ingredient line once and extract everything from the tokens"""
+        # Normalize ingredient text
+        ingredient_text = ingredient.lower()
+        with self.timer.stage('tokenize', items=1):
+            words = self.tokenize(ingredient_text)
         
-        for category, terms in self.categories.items():
-            if any(term in ingredient_words for term in terms):
-                categories.append(category)
+        # Quantities, units and categories in one pass, and the name's tokens
+        with self.timer.stage('match', items=1):
+            parsed = self.parser.parse(ingredient_text, words, self.stop_words)
+
+        # Lemmatized as a stage of its own; name tokens contain no whitespace
+        with self.timer.stage('lemmatize', items=1):
+            main_ingredient = ' '.join([self.lemmatize(word) for word in parsed.main_ingredient.split()])
+        return parsed._replace(main_ingredient=main_ingredient)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters for the line and lemma caches"""
+        stats = {}
+        for name, cache in (('lines', self.normalize_line), ('lemmas', self.lemmatize)):
+            info = cache.cache_info()
+            stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+        return stats
+
+    def total_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Cache counters for this process plus any worker processes"""
+        totals = self.cache_stats()
+        for worker_stats in self.worker_cache_stats.values():
+            for name, counters in worker_stats.items():
+                for key, value in counters.items():
+                    totals[name][key] += value
+        return totals
+
+    def process_recipe(self, recipe: Dict[str, Any]) -> None:
+        """Process the ingredients of a single recipe"""
+        contribution = self.recipe_contribution(recipe)
+        with self.timer.stage('aggregate', items=len(contribution['lines'])):
+            self.apply_contribution(contribution)
+
+    def recipe_contribution(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse a recipe into the per-line records that feed the aggregates"""
+        with self.timer.stage('parse', items=len(recipe['ingredients'])):
+            lines = [self.normalize_line(ingredient) for ingredient in recipe['ingredients']]
+            if self.aliases:
+                lines = [line._replace(main_ingredient=self.aliases.get(line.main_ingredient, line.main_ingredient))
+                         for line in lines]
+            return {
+                'title': recipe['title'],
+                'category': recipe.get('category', 'uncategorized'),
+                'lines': lines
+            }
+
+    def canonicalize(self, recipes: Iterable[Dict[str, Any]]) -> None:
+        """Cluster the recipes' ingredient names and save the alias map later runs apply"""
+        counts = Counter()
+        with self.timer.stage('canonicalize'):
+            for recipe in recipes:
+                for ingredient in recipe['ingredients']:
+                    counts[self.normalize_line(ingredient).main_ingredient] += 1
+            self.aliases = build_aliases(counts)
+            save_aliases(self.aliases, os.path.join(self.data_dir, ALIASES_FILE))
+
+    def apply_contribution(self, contribution: Dict[str, Any]) -> None:
+        """Add one recipe's parsed lines to the aggregates"""
+        recipe_ref = {'title': contribution['title'], 'category': contribution['category']}
+        self.data_version += 1
         
-        return categories if categories else ['other']
-
-    def process_ingredients(self) -> None:
-        """Process all ingredients from loaded recipes"""
-        for recipe in self.recipes:
-            recipe_title = recipe['title']
-            recipe_category = recipe.get('category', 'uncategorized')
-            
-            for ingredient in recipe['ingredients']:
-                # Normalize ingredient text
-                ingredient_text = ingredient.lower()
-                
-                # Extract quantities and units
-                quantities, units = self.extract_quantity_and_unit(ingredient_text)
-                
-                # Categorize ingredient
-                categories = self.categorize_ingredient(ingredient_text)
-                
-                # Remove quantities, units, and stop words to get the main ingredient
-                words = word_tokenize(ingredient_text)
-                main_ingredient = ' '.join([
-                    self.lemmatizer.lemmatize(word.lower()) 
-                    for word in words 
-                    if word.lower() not in self.stop_words 
-                    and word not in self.units 
-                    and not re.match(r'^\d+(?:/\d+)?$', word)
-                ])
-                
-                # Update ingredients data
-                self.ingredients_data[main_ingredient]['count'] += 1
-                self.ingredients_data[main_ingredient]['recipes'].append({
-                    'title': recipe_title,
-                    'category': recipe_category
-                })
-                self.ingredients_data[main_ingredient]['categories'].update(categories)
-                
-                for quantity in quantities:
-                    self.ingredients_data[main_ingredient]['common_quantities'][quantity] += 1
-                for unit in units:
-                    self.ingredients_data[main_ingredient]['common_units'][unit] += 1
-
-    def get_ingredient_stats(self) -> Dict[str, Any]:
-        """Get statistics about ingredients"""
-        stats = {
-            'total_ingredients': len(self.ingredients_data),
-            'total_recipes': len(self.recipes),
-            'ingredients_by_category': defaultdict(int),
-            'most_common_ingredients': [],
-            'most_common_units': defaultdict(int),
-            'category_distribution': defaultdict(int)
-        }
+        for quantities, units, categories, main_ingredient in contribution['lines']:
+            # Update ingredients data
+            data = self.ingredients_data[main_ingredient]
+            data['count'] += 1
+            data['recipes'].append(dict(recipe_ref))
+            for category in categories:
+                data['categories'][category] += 1
+            for quantity in quantities:
+                data['common_quantities'][quantity] += 1
+            for unit in units:
+                data['common_units'][unit] += 1
+
+    def process_incremental(self, state_file: str = 'ingredients_state.json') -> None:
+        """
+        Re-parse new and changed recipe files only, dropping deleted ones.
+
+        A manifest of file fingerprints detects changes, and each recipe's
+        parsed lines are persisted, so the aggregates are rebuilt without
+        re-parsing anything else. The append-only recipe store is read
+        from the offset reached by the previous run.
+        """
+        state_path = os.path.join(self.data_dir, state_file)
+        state = load_state(state_path)
+        digest = aliases_digest(self.aliases)
+        if (state.get('parser_version') != PARSER_VERSION or state.get('fingerprint_version') != FINGERPRINT_VERSION
+                or state.get('aliases') != digest):
+            # Lines parsed by another parser version, canonicalized with another
+            # alias map, or counted with other duplicate detection, can't be
+            # mixed with new ones
+            state = {'manifest': {}, 'contributions': {}}
+        manifest = Manifest(state['manifest'])
+        with self.timer.stage('scan'):
+            changes = manifest.scan(self.data_dir, self.recipe_files())
         
-        # Process ingredients
-        for ingredient, data in self.ingredients_data.items():
-            # Count ingredients by category
-            for category in data['categories']:
-                stats['ingredients_by_category'][category] += 1
-            
-            # Most common ingredients
-            stats['most_common_ingredients'].append({
-                'ingredient': ingredient,
-                'count': data['count'],
-                'categories': list(data['categories'])
-            })
-            
-            # Most common units
-            for unit, count in data['common_units'].items():
-                stats['most_common_units'][unit] += count
+        contributions = state['contributions']
+        for filename in changes.removed + changes.changed:
+            contributions.pop(filename, None)
+        for filename in changes.added + changes.changed:
+            recipe = self.load_recipe(filename)
+            # Fingerprinted so duplicate files can be left out below
+            contributions[filename] = {**self.recipe_contribution(recipe),
+                                       'fingerprint': self.legacy_fingerprint(filename, recipe)}
+
+        store = RecipeStore(self.data_dir)
+        offset = state.get('store_offset', 0)
+        if offset > store.size():
+            # The store was rewritten; drop everything that came from it
+            for key in [key for key in contributions if key.startswith('store:')]:
+                del contributions[key]
+            offset = 0
+        store_records = 0
+        for recipe_id, recipe, offset in store.iter_records(offset, latest_only=False):
+            # A re-appended record supersedes the old one
+            contributions[f'store:{recipe_id}'] = self.recipe_contribution(recipe)
+            store_records += 1
         
-        # Sort most common ingredients
-        stats['most_common_ingredients'].sort(key=lambda x: x['count'], reverse=True)
+        # Store records first, then legacy files in name order, as iter_recipes() streams them
+        self.ingredients_data = defaultdict(_empty_ingredient)
+        duplicates = LegacyDuplicates(store)
+        self.total_recipes = 0
+        with self.timer.stage('aggregate'):
+            for key in sorted(contributions, key=lambda key: (not key.startswith('store:'), key)):
+                contribution = contributions[key]
+                if 'fingerprint' in contribution and duplicates.check(contribution['fingerprint']):
+                    continue
+                self.apply_contribution(contribution)
+                self.total_recipes += 1
         
-        return stats
+        save_state(state_path, {
+            'parser_version': PARSER_VERSION,
+            'fingerprint_version': FINGERPRINT_VERSION,
+            'aliases': digest,
+            'manifest': manifest.files,
+            'store_offset': offset,
+            'contributions': contributions
+        })
+        print(f"Incremental update: {len(changes.added)} added, {len(changes.changed)} changed, "
+              f"{len(changes.removed)} removed, {len(changes.unchanged)} unchanged files; "
+              f"{store_records} new store records")
 
-    def save_processed_data(self, output_file: str = 'processed_ingredients.json') -> None:
-        """Save processed ingredient data to JSON file"""
-        output_path = os.path.join(self.data_dir, output_file)
-        
-        # Convert sets to lists for JSON serialization
+    def sort_aggregates(self) -> None:
+        """Order ingredients, recipes and counters by key, so the output doesn't depend on processing order"""
+        ordered = defaultdict(_empty_ingredient)
+        for ingredient in sorted(self.ingredients_data):
+            data = self.ingredients_data[ingredient]
+            merged = ordered[ingredient]
+            merged['count'] = data['count']
+            merged['recipes'] = sorted(data['recipes'], key=lambda recipe: (recipe['title'], recipe['category']))
+            for counter in ('categories', 'common_quantities', 'common_units'):
+                merged[counter].update(sorted(data[counter].items()))
+        self.ingredients_data = ordered
+        self.data_version += 1
+
+    def get_ingredient_stats(self, top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Get statistics about ingredients, cached until the aggregates change"""
+        total_recipes = self.total_recipes if self.total_recipes is not None else len(self.recipes)
+        key = (id(self.ingredients_data), self.data_version, total_recipes, top_k)
+        if self._stats_cache is None or self._stats_cache[0] != key:
+            self._stats_cache = (key, ingredient_stats(self.ingredients_data, total_recipes, top_k))
+        return self._stats_cache[1]
+
+    def export_aggregates(self) -> Dict[str, Dict[str, Any]]:
+        """Ingredient data as plain dicts, keeping category counts for merging"""
+        return {
+            ingredient: {
+                'count': data['count'],
+                'recipes': data['recipes'],
+                'categories': dict(data['categories']),
+                'common_quantities': dict(data['common_quantities']),
+                'common_units': dict(data['common_units'])
+            }
+            for ingredient, data in self.ingredients_data.items()
+        }
+
+    def serializable_data(self) -> Dict[str, Dict[str, Any]]:
+        """Ingredient data with sets and defaultdicts converted to plain JSON types"""
         serializable_data = {}
         for ingredient, data in self.ingredients_data.items():
             serializable_data[ingredient] = {
                 'count': data['count'],
                 'recipes': data['recipes'],
-                'categories': list(data['categories']),
+                'categories': sorted(data['categories']),
                 'common_quantities': dict(data['common_quantities']),
                 'common_units': dict(data['common_units'])
             }
+        return serializable_data
+
+    def save_processed_data(self, output_file: str = 'processed_ingredients.json') -> None:
+        """Save processed ingredient data to JSON file"""
+        output_path = os.path.join(self.data_dir, output_file)
+        self.sort_aggregates()
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump({
-                'ingredients': serializable_data,
+        with self.timer.stage('stats', items=len(self.ingredients_data)):
+            processed = {
+                'ingredients': self.serializable_data(),
                 'stats': self.get_ingredient_stats()
-            }, f, indent=2, ensure_ascii=False)
+            }
+        with self.timer.stage('save'):
+            # Written atomically, since a running server reloads the file when it changes
+            tmp_path = f'{output_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(processed, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, output_path)
         
         print(f"Processed data saved to {output_path}")
 
+        with self.timer.stage('artifacts'):
+            # Interned, minified variant for faster loading in the browser
+            save_compact(processed, os.path.join(self.data_dir, 'processed_ingredients.compact.json'))
+
+            # Read-only index the API maps instead of parsing the JSON
+            save_index(processed, os.path.join(self.data_dir, 'ingredients.idx'))
+
+            # Precompute ingredient co-occurrence for the heatmap view
+            save_cooccurrence(self.ingredients_data, os.path.join(self.data_dir, 'cooccurrence.json'))
+
+            # Precompute the recipe/ingredient graph for the network view
+            save_recipe_graph(self.ingredients_data, os.path.join(self.data_dir, 'recipe_graph.json'))
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Process scraped recipe ingredients')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes to shard recipes across')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-parse new, changed or deleted recipe files')
+    parser.add_argument('--profile', action='store_true',
+                        help='write a cProfile dump and a JSON timing summary next to the output')
+    parser.add_argument('--canonicalize', action='store_true',
+                        help='cluster near-duplicate ingredient names and save the alias map later runs apply')
+    args = parser.parse_args()
+
     # Process ingredients
     processor = IngredientProcessor()
-    processor.load_recipes()
-    processor.process_ingredients()
-    processor.save_processed_data()
+    output_base = os.path.join(processor.data_dir, 'processed_ingredients')
+    with profiled(f'{output_base}.prof' if args.profile else None):
+        if args.canonicalize:
+            # Cluster the raw names first; the aggregates below are built with the new map
+            processor.canonicalize(processor.iter_recipes())
+        if args.incremental:
+            processor.process_incremental()
+        else:
+            processor.process_ingredients(workers=args.workers, recipes=processor.iter_recipes())
+        processor.save_processed_data()
     
     # Print some basic statistics
     stats = processor.get_ingredient_stats()
@@ -202,4 +501,10 @@ if __name__ == "__main__":
         print(f"- {ing['ingredient']}: {ing['count']} recipes")
     print("\nIngredients by category:")
     for category, count in stats['ingredients_by_category'].items():
-        print(f"- {category}: {count} ingredients") 
\ No newline at end of file
+        print(f"- {category}: {count} ingredients")
+    print("\nParser cache:")
+    for name, counters in processor.total_cache_stats().items():
+        print(f"- {name}: {counters['hits']} hits, {counters['misses']} misses")
+    processor.timer.report()
+    if args.profile:
+        processor.timer.save(f'{output_base}.timings.json') 
\ No newline at end of file
@@ -1,56 +1,177 @@
+import argparse
 import json
 import os
 from collections import defaultdict
 from pathlib import Path
 
+from build_index import save_index
+from canonicalize import aliases_digest, build_aliases, load_aliases, save_aliases
+from compact_format import save_compact
+from fingerprint import FINGERPRINT_VERSION
+from cooccurrence import save_cooccurrence
+from incremental import Manifest, load_state, save_state
+from instrumentation import StageTimer, profiled
+from recipe_graph import save_recipe_graph
+from recipe_store import LegacyDuplicates, RecipeStore, legacy_recipe_files, recipe_id_category, record_identity
+
+def load_recipe(file):
+    """Load a single recipe file, or None if it is not a valid recipe."""
+    try:
+        with open(file, 'r') as f:
+            recipe = json.load(f)
+            if isinstance(recipe, dict):  # Only process valid recipe objects
+                recipe['filename'] = file.name
+                recipe['category'] = recipe_id_category(file.stem)  # Extract category from filename
+                return recipe
+    except json.JSONDecodeError:
+        print(f"Error loading {file}")
+    return None
+
+def store_recipe(recipe_id, recipe):
+    """Annotate a recipe read from the store the same way as a legacy file."""
+    recipe['filename'] = recipe_id
+    recipe['category'] = recipe_id_category(recipe_id)
+    return recipe
+
 def load_recipes(data_dir):
-    """Load all recipe JSON files from the data directory."""
-    recipes = []
-    for file in Path(data_dir).glob('*.json'):
-        if file.name == 'processed_ingredients.json':
-            continue  # Skip our output file
-        try:
-            with open(file, 'r') as f:
-                recipe = json.load(f)
-                if isinstance(recipe, dict):  # Only process valid recipe objects
-                    recipe['filename'] = file.name
-                    recipe['category'] = file.stem.split('_')[0]  # Extract category from filename
-                    recipes.append(recipe)
-        except json.JSONDecodeError:
-            print(f"Error loading {file}")
-    return recipes
-
-def process_ingredients(recipes):
-    """Process ingredients from recipes and count their occurrences."""
+    """Stream recipes from the recipe store, then any legacy per-recipe files that don't duplicate one."""
+    store = RecipeStore(data_dir)
+    for recipe_id, recipe, _ in store.iter_records():
+        yield store_recipe(recipe_id, recipe)
+    duplicates = LegacyDuplicates(store)
+    for file in legacy_recipe_files(data_dir):
+        recipe = load_recipe(file)
+        if recipe is not None and not duplicates.check(record_identity(file.stem, recipe)[0]):
+            yield recipe
+
+def clean_ingredient(ingredient):
+    """Strip quantities and measurements from an ingredient line."""
+    # Clean up ingredient text
+    clean_ingredient = ingredient.lower().strip()
+    # Remove quantities and measurements
+    return ' '.join([word for word in clean_ingredient.split() 
+                     if not any(char.isdigit() for char in word)
+                     and word not in ['g', 'ml', 'kg', 'oz', 'tbsp', 'tsp', 'cup', 'cups']])
+
+def recipe_contribution(recipe, aliases=None):
+    """The part of a recipe that feeds the aggregates, in a persistable form."""
+    cleaned = (clean_ingredient(ingredient) for ingredient in recipe.get('ingredients', []))
+    # Only keep lines with something left after cleaning
+    ingredients = [ingredient for ingredient in cleaned if ingredient]
+    if aliases:
+        ingredients = [aliases.get(ingredient, ingredient) for ingredient in ingredients]
+    return {
+        'title': recipe['title'],
+        'category': recipe['category'],
+        'ingredients': ingredients
+    }
+
+def new_aggregates():
+    """Empty ingredient aggregates, with per-category counts."""
     ingredient_data = defaultdict(lambda: {
         'count': 0,
         'recipes': [],
-        'categories': set()
+        'categories': defaultdict(int)
     })
-    category_counts = defaultdict(int)
+    return ingredient_data, defaultdict(int)
+
+def apply_contribution(ingredient_data, category_counts, contribution):
+    """Add one recipe's contribution to the aggregates."""
+    category = contribution['category']
+    
+    for ingredient in contribution['ingredients']:
+        data = ingredient_data[ingredient]
+        data['count'] += 1
+        data['categories'][category] += 1
+        category_counts[category] += 1
+        data['recipes'].append({'title': contribution['title'], 'category': category})
+
+def process_ingredients(recipes, aliases=None):
+    """Process ingredients from recipes and count their occurrences."""
+    ingredient_data, category_counts = new_aggregates()
     
     for recipe in recipes:
-        category = recipe['category']
-        ingredients = recipe.get('ingredients', [])
-        
-        for ingredient in ingredients:
-            # Clean up ingredient text
-            clean_ingredient = ingredient.lower().strip()
-            # Remove quantities and measurements
-            clean_ingredient = ' '.join([word for word in clean_ingredient.split() 
-                                      if not any(char.isdigit() for char in word)
-                                      and word not in ['g', 'ml', 'kg', 'oz', 'tbsp', 'tsp', 'cup', 'cups']])
-            if clean_ingredient:  # Only add if there's something left after cleaning
-                ingredient_data[clean_ingredient]['count'] += 1
-                ingredient_data[clean_ingredient]['recipes'].append({
-                    'title': recipe['title'],
-                    'category': category
-                })
-                ingredient_data[clean_ingredient]['categories'].add(category)
-                category_counts[category] += 1
+        apply_contribution(ingredient_data, category_counts, recipe_contribution(recipe, aliases))
     
     return ingredient_data, category_counts
 
+def canonical_order(ingredient_data, category_counts):
+    """Aggregates sorted by name, so the output doesn't depend on the order recipes were applied in."""
+    ordered = {}
+    for ingredient in sorted(ingredient_data):
+        data = ingredient_data[ingredient]
+        ordered[ingredient] = {
+            'count': data['count'],
+            'recipes': sorted(data['recipes'], key=lambda recipe: (recipe['title'], recipe['category'])),
+            'categories': dict(sorted(data['categories'].items()))
+        }
+    return ordered, dict(sorted(category_counts.items()))
+
+def process_incremental(data_dir, state_file, aliases=None):
+    """
+    Re-parse new and changed recipe files only, dropping deleted ones.
+    
+    Each recipe's cleaned ingredients are persisted, and the aggregates are
+    rebuilt from them rather than stored a second time. Returns the
+    aggregates and the number of recipes they cover.
+    """
+    state = load_state(state_file)
+    digest = aliases_digest(aliases or {})
+    if state.get('aliases') != digest or state.get('fingerprint_version') != FINGERPRINT_VERSION:
+        # Contributions canonicalized with another alias map, or counted with
+        # other duplicate detection, can't be mixed with new ones
+        state = {'manifest': {}, 'contributions': {}}
+    manifest = Manifest(state['manifest'])
+    changes = manifest.scan(data_dir, [file.name for file in legacy_recipe_files(data_dir)])
+    
+    contributions = state['contributions']
+    for name in changes.removed + changes.changed:
+        contributions.pop(name, None)
+    for name in changes.added + changes.changed:
+        file = Path(data_dir) / name
+        recipe = load_recipe(file)
+        if recipe is not None:
+            # Fingerprinted so duplicate files can be left out below
+            contributions[name] = {**recipe_contribution(recipe, aliases),
+                                   'fingerprint': record_identity(file.stem, recipe)[0]}
+    
+    # The store is append-only, so only records past the last offset are new
+    store = RecipeStore(data_dir)
+    offset = state.get('store_offset', 0)
+    if offset > store.size():
+        # The store was rewritten; drop everything that came from it
+        for key in [key for key in contributions if key.startswith('store:')]:
+            del contributions[key]
+        offset = 0
+    store_records = 0
+    for recipe_id, recipe, offset in store.iter_records(offset, latest_only=False):
+        # A re-appended record supersedes the old one
+        contributions[f'store:{recipe_id}'] = recipe_contribution(store_recipe(recipe_id, recipe), aliases)
+        store_records += 1
+    
+    # Store records first, then legacy files in name order, as load_recipes() streams them
+    ingredient_data, category_counts = new_aggregates()
+    duplicates = LegacyDuplicates(store)
+    recipes = 0
+    for key in sorted(contributions, key=lambda key: (not key.startswith('store:'), key)):
+        contribution = contributions[key]
+        if 'fingerprint' in contribution and duplicates.check(contribution['fingerprint']):
+            continue
+        apply_contribution(ingredient_data, category_counts, contribution)
+        recipes += 1
+    
+    save_state(state_file, {
+        'aliases': digest,
+        'fingerprint_version': FINGERPRINT_VERSION,
+        'manifest': manifest.files,
+        'store_offset': offset,
+        'contributions': contributions
+    })
+    print(f"Incremental update: {len(changes.added)} added, {len(changes.changed)} changed, "
+          f"{len(changes.removed)} removed, {len(changes.unchanged)} unchanged files; "
+          f"{store_records} new store records")
+    return ingredient_data, category_counts, recipes
+
 def create_visualization_data(ingredient_data, category_counts):
     """Create the JSON structure needed for the visualization."""
     # Convert sets to lists for JSON serialization
@@ -81,25 +202,23 @@ def create_visualization_data(ingredient_data, category_counts):
     return processed_data
 
 def main():
+    parser = argparse.ArgumentParser(description='Aggregate scraped recipes into visualization data')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-parse new, changed or deleted recipe files')
+    parser.add_argument('--profile', action='store_true',
+                        help='write a cProfile dump and a JSON timing summary next to the output')
+    parser.add_argument('--canonicalize', action='store_true',
+                        help='cluster near-duplicate ingredient names and save the alias map later runs apply')
+    args = parser.parse_args()
+    
     # Create directories if they don't exist
     os.makedirs('data', exist_ok=True)
-    
-    # Load and process recipes
-    recipes = load_recipes('data')
-    print(f"Loaded {len(recipes)} recipes")
-    
-    # Process ingredients
-    ingredient_data, category_counts = process_ingredients(recipes)
-    print(f"Found {len(ingredient_data)} unique ingredients")
-    
-    # Create visualization data
-    viz_data = create_visualization_data(ingredient_data, category_counts)
-    
-    # Save the processed data
     output_file = 'data/processed_ingredients.json'
-    with open(output_file, 'w') as f:
-        json.dump(viz_data, f, indent=2)
-    print(f"Saved processed data to {output_file}")
+    output_base = os.path.splitext(output_file)[0]
+    timer = StageTimer()
+    
+    with profiled(f'{output_base}.prof' if args.profile else None):
+        viz_data, ingredient_data, category_counts = run(args, output_file, timer)
     
     # Print some statistics
     print("\nIngredients by category:")
@@ -110,5 +229,68 @@ def main():
     for item in viz_data['stats']['most_common_ingredients'][:10]:
         print(f"{item['ingredient']}: {item['count']} occurrences in {item['categories']}")
 
+    timer.report()
+    if args.profile:
+        timer.save(f'{output_base}.timings.json')
+
+def run(args, output_file, timer):
+    """Aggregate recipes and write every output, timing each stage."""
+    aliases_file = 'data/ingredient_aliases.json'
+    if args.canonicalize:
+        # Cluster the raw cleaned names; the aggregates below are rebuilt with the new map
+        with timer.stage('canonicalize'):
+            raw_data, _ = process_ingredients(load_recipes('data'))
+            save_aliases(build_aliases({name: data['count'] for name, data in raw_data.items()}), aliases_file)
+    aliases = load_aliases(aliases_file) or {}
+    
+    if args.incremental:
+        with timer.stage('process'):
+            ingredient_data, category_counts, total = process_incremental('data', 'data/recipes_state.json', aliases)
+        print(f"Aggregates cover {total} recipes")
+    else:
+        # Stream and process recipes
+        loaded = 0
+        def counted(recipes):
+            nonlocal loaded
+            for recipe in recipes:
+                loaded += 1
+                yield recipe
+        
+        # Process ingredients
+        with timer.stage('process'):
+            recipes = timer.iterate('load', counted(load_recipes('data')))
+            ingredient_data, category_counts = process_ingredients(recipes, aliases)
+        timer.add('process', items=loaded)
+        print(f"Loaded {loaded} recipes")
+    ingredient_data, category_counts = canonical_order(ingredient_data, category_counts)
+    print(f"Found {len(ingredient_data)} unique ingredients")
+    
+    # Create visualization data
+    with timer.stage('visualization', items=len(ingredient_data)):
+        viz_data = create_visualization_data(ingredient_data, category_counts)
+    
+    # Save the processed data
+    with timer.stage('save'):
+        # Written atomically, since a running server reloads the file when it changes
+        tmp_file = f'{output_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(viz_data, f, indent=2)
+        os.replace(tmp_file, output_file)
+    print(f"Saved processed data to {output_file}")
+
+    with timer.stage('artifacts'):
+        # Interned, minified variant for faster loading in the browser
+        save_compact(viz_data, 'data/processed_ingredients.compact.json')
+
+        # Read-only index the API maps instead of parsing the JSON
+        save_index(viz_data, 'data/ingredients.idx')
+
+        # Precompute ingredient co-occurrence for the heatmap view
+        save_cooccurrence(ingredient_data, 'data/cooccurrence.json')
+
+        # Precompute the recipe/ingredient graph for the network view
+        save_recipe_graph(ingredient_data, 'data/recipe_graph.json')
+    return viz_data, ingredient_data, category_counts
+
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,67 @@
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict
+
+
+def build_recipe_graph(ingredient_data: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the bipartite recipe/ingredient graph as compact columnar arrays.
+
+    Ingredients take node IDs 0..n-1 in name order and recipes follow in
+    title order. Edge weight is how many times an ingredient is listed
+    for a recipe; degree is the number of distinct neighbours.
+    """
+    ingredient_names = sorted(ingredient_data)
+    recipe_categories = defaultdict(set)
+    weights = defaultdict(int)
+    for name in ingredient_names:
+        for recipe in ingredient_data[name]['recipes']:
+            recipe_categories[recipe['title']].add(recipe['category'])
+            weights[(name, recipe['title'])] += 1
+
+    recipe_titles = sorted(recipe_categories)
+    ids = {('ingredient', name): i for i, name in enumerate(ingredient_names)}
+    ids.update({('recipe', title): len(ingredient_names) + i for i, title in enumerate(recipe_titles)})
+
+    labels = ingredient_names + recipe_titles
+    degree = [0] * len(labels)
+    edges = {'source': [], 'target': [], 'weight': []}
+    for (name, title), weight in sorted(weights.items()):
+        source, target = ids[('ingredient', name)], ids[('recipe', title)]
+        edges['source'].append(source)
+        edges['target'].append(target)
+        edges['weight'].append(weight)
+        degree[source] += 1
+        degree[target] += 1
+
+    return {
+        'nodes': {
+            'label': labels,
+            'type': ['ingredient'] * len(ingredient_names) + ['recipe'] * len(recipe_titles),
+            'degree': degree,
+            'categories': [sorted(ingredient_data[name]['categories']) for name in ingredient_names]
+                          + [sorted(recipe_categories[title]) for title in recipe_titles]
+        },
+        'edges': edges
+    }
+
+
+def save_recipe_graph(ingredient_data: Dict[str, Dict[str, Any]],
+                      output_path: str = 'data/recipe_graph.json') -> None:
+    """Build the recipe/ingredient graph and write it next to the processed data"""
+    graph = build_recipe_graph(ingredient_data)
+    # Written atomically, since a running server reloads the file when it changes
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(graph, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, output_path)
+    print(f"Saved recipe graph ({len(graph['nodes']['label'])} nodes, "
+          f"{len(graph['edges']['source'])} edges) to {output_path}")
+
+
+if __name__ == '__main__':
+    # Rebuild the graph from an existing processed data file
+    with open(os.path.join('data', 'processed_ingredients.json'), 'r', encoding='utf-8') as f:
+        processed = json.load(f)
+    save_recipe_graph(processed['ingredients'])
@@ -1,104 +1,233 @@
 from recipe_scrapers import scrape_html
+import argparse
 import requests
 import json
 import os
+import time
 from typing import Dict, List, Any
 from datetime import datetime
 
+from http_cache import ResponseCache
+from recipe_store import RecipeStore
+from scrape_engine import FetchEngine, Page, ScrapePipeline
+
+def parse_recipe_html(html: str, url: str) -> Dict[str, Any]:
+    """
+    Extract recipe fields from a page's HTML (module-level so parse workers can run it)
+    """
+    # Use scrape_html instead of scrape_me
+    scraper = scrape_html(html, org_url=url)
+    
+    return {
+        'title': scraper.title(),
+        'total_time': scraper.total_time(),
+        'ingredients': scraper.ingredients(),
+        'instructions': scraper.instructions(),
+        'image': scraper.image(),
+        'host': scraper.host(),
+        'nutrients': scraper.nutrients()
+    }
+
+def read_page(saved) -> Page:
+    """Load a page saved on disk, given its (URL, body path)"""
+    url, path = saved
+    with open(path, 'r', encoding='utf-8') as f:
+        return Page(url, f.read())
+
+def replay(cache_dir: str, parse_workers: int = None) -> Dict[str, int]:
+    """
+    Re-parse every page saved in a directory (a response cache or a folder of
+    .html fixtures), offline, on all cores, and store the refreshed fields
+    back in the cache for pages that have an entry there
+    """
+    cache = ResponseCache(cache_dir)
+    pipeline = ScrapePipeline(read_page, parse_recipe_html, fetchers=2, parse_workers=parse_workers)
+    counts = {'parsed': 0, 'failed': 0}
+    start = time.perf_counter()
+    for (url, _), page, fields, error in pipeline.run(cache.saved_pages()):
+        if error is not None:
+            print(f"Error parsing {url}: {str(error)}")
+            counts['failed'] += 1
+            continue
+        cache.update_parsed(url, fields)
+        counts['parsed'] += 1
+    elapsed = time.perf_counter() - start
+    total = counts['parsed'] + counts['failed']
+    print(f"Replayed {total} pages in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} pages/s) "
+          f"with {pipeline.parse_workers} parse workers; {counts['failed']} failed")
+    return counts
+
 class RecipeScraper:
-    def __init__(self, output_dir: str = 'data'):
+    def __init__(self, output_dir: str = 'data', concurrency: int = 8,
+                 per_host_concurrency: int = 2, per_host_rate: float = 2.0,
+                 session: requests.Session = None, cache_dir: str = None,
+                 parse_workers: int = None, queue_size: int = 32):
         self.output_dir = output_dir
+        # Parsing runs in a process pool fed through a bounded page queue
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        # Ids of stored recipes that a scrape found unchanged, so nothing was written
+        self.duplicates: List[str] = []
         os.makedirs(output_dir, exist_ok=True)
+        # Recipes are appended to a single JSONL store rather than one file each
+        self.store = RecipeStore(output_dir)
+        # Conditional revalidation of previously fetched pages
+        self.cache = ResponseCache(cache_dir or os.path.join(output_dir, 'http_cache'))
         # Headers to mimic a browser request
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Pooled, rate-limited fetching shared by all scrapes
+        self.engine = FetchEngine(self.headers, concurrency=concurrency,
+                                  per_host_concurrency=per_host_concurrency,
+                                  per_host_rate=per_host_rate, session=session)
+
+    def fetch_page(self, url: str) -> Page:
+        """
+        Fetch a recipe page, revalidating any cached copy
+        """
+        # The engine raises on bad status codes
+        cached = self.cache.get(url)
+        response = self.engine.fetch(url, headers=self.cache.conditional_headers(cached))
+        
+        if response.status_code == 304 and cached:
+            # Unchanged since the last run, so reuse the parsed fields
+            print(f"Not modified: {url}")
+            return Page(url, None, parsed=cached['parsed'])
+        
+        if self.cache.unchanged(cached, response.text):
+            # Re-sent without validators (or with new ones) but identical, so don't re-parse
+            print(f"Unchanged: {url}")
+            return Page(url, None, parsed=cached['parsed'])
+        
+        print(f"Fetching recipe from: {url}")
+        return Page(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+    def complete_recipe(self, page: Page, fields: Dict[str, Any], category: str = None) -> Dict[str, Any]:
+        """
+        Cache a freshly parsed page and build the recipe record
+        """
+        if page.html is not None:
+            self.cache.put(page.url, page.html, page.etag, page.last_modified, fields)
+        
+        recipe_data = {
+            **fields,
+            'category': category,
+            'scraped_at': datetime.now().isoformat(),
+            'url': page.url
+        }
+        
+        print(f"Successfully scraped recipe: {recipe_data['title']}")
+        return recipe_data
+
+    def report_error(self, url: str, error: Exception) -> None:
+        if isinstance(error, requests.exceptions.RequestException):
+            print(f"Network error while scraping {url}: {str(error)}")
+        else:
+            print(f"Error scraping {url}: {str(error)}")
 
     def scrape_recipe(self, url: str, category: str = None) -> Dict[str, Any]:
         """
-        Scrape a recipe from a given URL
+        Scrape a recipe from a given URL, parsing it on the calling thread
         """
         try:
-            # Fetch the HTML content with headers
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()  # Raise an error for bad status codes
-            html = response.text
-            
-            print(f"Fetching recipe from: {url}")
-            
-            # Use scrape_html instead of scrape_me
-            scraper = scrape_html(html, org_url=url)
-            
-            recipe_data = {
-                'title': scraper.title(),
-                'total_time': scraper.total_time(),
-                'ingredients': scraper.ingredients(),
-                'instructions': scraper.instructions(),
-                'image': scraper.image(),
-                'host': scraper.host(),
-                'nutrients': scraper.nutrients(),
-                'category': category,
-                'scraped_at': datetime.now().isoformat(),
-                'url': url
-            }
-            
-            print(f"Successfully scraped recipe: {recipe_data['title']}")
-            return recipe_data
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Network error while scraping {url}: {str(e)}")
-            return None
+            page = self.fetch_page(url)
+            fields = page.parsed if page.html is None else self.parse_recipe(page.html, url)
+            return self.complete_recipe(page, fields, category)
         except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
+            self.report_error(url, e)
             return None
 
-    def save_recipe(self, recipe_data: Dict[str, Any], filename: str = None) -> str:
+    def parse_recipe(self, html: str, url: str) -> Dict[str, Any]:
+        """
+        Extract recipe fields from a page's HTML
+        """
+        return parse_recipe_html(html, url)
+
+    def save_recipe(self, recipe_data: Dict[str, Any], recipe_id: str = None) -> str:
         """
-        Save recipe data to JSON file
+        Append recipe data to the recipe store and return its record id
+
+        Nothing is written (and None is returned) when the store already holds
+        the same recipe from the same URL and category. A page whose content
+        changed is saved under its earlier record id, superseding it.
         """
         if recipe_data is None:
             return None
+        
+        duplicate = self.store.duplicate_of(recipe_data, recipe_id)
+        if duplicate is not None:
+            print(f"Unchanged recipe {recipe_data['title']}, already stored as {duplicate}")
+            self.duplicates.append(duplicate)
+            return None
             
-        if filename is None:
+        if recipe_id is None:
+            recipe_id = self.store.source_record(recipe_data)
+        if recipe_id is None:
             category_prefix = recipe_data.get('category', '').lower().replace(' ', '_')
             if category_prefix:
-                filename = f"{category_prefix}_{recipe_data['title'].lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                recipe_id = f"{category_prefix}_{recipe_data['title'].lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             else:
-                filename = f"{recipe_data['title'].lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        filepath = os.path.join(self.output_dir, filename)
+                recipe_id = f"{recipe_data['title'].lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(recipe_data, f, indent=2, ensure_ascii=False)
-            print(f"Saved recipe to: {filepath}")
-            return filepath
+            self.store.append(recipe_id, recipe_data)
+            print(f"Saved recipe {recipe_id} to: {self.store.path}")
+            return recipe_id
         except Exception as e:
-            print(f"Error saving recipe to {filepath}: {str(e)}")
+            print(f"Error saving recipe {recipe_id} to {self.store.path}: {str(e)}")
             return None
 
     def scrape_and_save(self, recipe_urls: Dict[str, List[str]]) -> Dict[str, List[str]]:
         """
         Scrape multiple recipes and save them, organized by category
         """
-        saved_files = {}
+        saved_ids = {category: [] for category in recipe_urls}
+        jobs = [(category, url) for category, urls in recipe_urls.items() for url in urls]
         
-        for category, urls in recipe_urls.items():
-            print(f"\nScraping {category} recipes...")
-            saved_files[category] = []
-            
-            for url in urls:
-                recipe_data = self.scrape_recipe(url, category)
-                if recipe_data:
-                    filepath = self.save_recipe(recipe_data)
-                    if filepath:
-                        saved_files[category].append(filepath)
+        # A URL listed under several categories is fetched only once
+        unique_urls = list(dict.fromkeys(url for _, url in jobs))
+        print(f"\nScraping {len(unique_urls)} recipes ({len(jobs)} listings) across {len(recipe_urls)} categories...")
+        
+        categories = {}
+        for category, url in jobs:
+            categories.setdefault(url, []).append(category)
+        
+        # Fetch on the engine's threads and parse in worker processes; each
+        # recipe is saved as soon as it is parsed
+        pipeline = ScrapePipeline(self.fetch_page, parse_recipe_html, fetchers=self.engine.concurrency,
+                                  parse_workers=self.parse_workers, queue_size=self.queue_size)
+        for url, page, fields, error in pipeline.run(unique_urls):
+            if error is not None:
+                self.report_error(url, error)
+                continue
+            recipe_data = self.complete_recipe(page, fields)
+            for category in categories[url]:
+                recipe_id = self.save_recipe({**recipe_data, 'category': category})
+                if recipe_id:
+                    saved_ids[category].append(recipe_id)
                         
-        return saved_files
+        return saved_ids
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scrape recipes into the data directory')
+    parser.add_argument('--concurrency', type=int, default=8, help='maximum requests in flight')
+    parser.add_argument('--per-host', type=int, default=2, help='maximum requests in flight per host')
+    parser.add_argument('--rate', type=float, default=2.0, help='requests per second per host')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='processes parsing fetched pages (default: one per core)')
+    parser.add_argument('--replay', metavar='CACHE_DIR', default=None,
+                        help='re-parse the pages saved in a response cache directory (e.g. data/http_cache) '
+                             'or a folder of .html fixtures offline and exit')
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay, args.parse_workers)
+        raise SystemExit(0)
+
     # Example usage with categorized recipes
-    scraper = RecipeScraper()
+    scraper = RecipeScraper(concurrency=args.concurrency, per_host_concurrency=args.per_host,
+                            per_host_rate=args.rate, parse_workers=args.parse_workers)
     
     recipe_urls = {
         "Italian": [
@@ -169,24 +298,24 @@ if __name__ == "__main__":
         ]
     }
     
-    saved_files = scraper.scrape_and_save(recipe_urls)
+    saved_ids = scraper.scrape_and_save(recipe_urls)
     
     print("\nSummary of scraped recipes:")
     total_recipes = 0
-    for category, files in saved_files.items():
-        print(f"{category}: {len(files)} recipes")
-        total_recipes += len(files)
+    for category, ids in saved_ids.items():
+        print(f"{category}: {len(ids)} recipes")
+        total_recipes += len(ids)
     print(f"\nTotal: {total_recipes} recipes saved to {scraper.output_dir}")
+    print(f"Skipped {len(scraper.duplicates)} unchanged recipes already in the store")
     
     # Print sources summary
     print("\nRecipes by source:")
     sources = {}
-    for category, file_list in saved_files.items():
-        for filepath in file_list:
-            with open(filepath, 'r') as f:
-                recipe = json.load(f)
-                source = recipe['host']
-                sources[source] = sources.get(source, 0) + 1
+    for category, id_list in saved_ids.items():
+        for recipe_id in id_list:
+            recipe = scraper.store.get(recipe_id)
+            source = recipe['host']
+            sources[source] = sources.get(source, 0) + 1
     
     for source, count in sources.items():
         print(f"{source}: {count} recipes") 
\ No newline at end of file
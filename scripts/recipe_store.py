@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from fingerprint import recipe_fingerprint, source_key
+
+# Files in data/ written by the pipeline rather than the scraper
+DERIVED_FILES = {
+    'processed_ingredients.json', 'processed_ingredients.compact.json',
+    'processed_ingredients.timings.json', 'cooccurrence.json', 'recipe_graph.json',
+    'recipes_state.json', 'ingredients_state.json', 'nltk_tables.json', 'ingredient_aliases.json',
+    'lemma_aliases.json'
+}
+
+
+class FingerprintIndex:
+    """
+    Fingerprints of the records in a store.
+
+    `first` maps each fingerprint to the id it was first stored under; a
+    later record with the same fingerprint under another id is a duplicate
+    and its offset is in `duplicates`. `sources` maps each source key
+    (category and URL) to the id of its latest record.
+    """
+
+    def __init__(self):
+        self.first: Dict[str, str] = {}
+        self.sources: Dict[str, str] = {}
+        self.duplicates: Set[int] = set()
+        self.indexed_to = 0
+
+    def add(self, offset: int, length: int, fingerprint: str, source: str, recipe_id: str) -> None:
+        if self.first.setdefault(fingerprint, recipe_id) != recipe_id:
+            self.duplicates.add(offset)
+        elif source:
+            self.sources[source] = recipe_id
+        self.indexed_to = max(self.indexed_to, offset + length)
+
+
+def record_identity(recipe_id: Optional[str], recipe: Dict[str, Any]) -> Tuple[str, str]:
+    """Fingerprint and source key of a record, with the category taken from its id if missing"""
+    if not recipe.get('category') and recipe_id is not None:
+        recipe = {**recipe, 'category': recipe_id_category(recipe_id)}
+    return recipe_fingerprint(recipe), source_key(recipe)
+
+
+class RecipeStore:
+    """
+    Append-only, newline-delimited recipe store.
+
+    Each line of `recipes.jsonl` is {"id": ..., "recipe": {...}}. A
+    sidecar index (`recipes.jsonl.idx`) records the byte offset and length
+    of every record, one tab-separated line per append, so single records
+    can be read with one seek. A record appended again under an existing
+    id supersedes the earlier one.
+
+    A second sidecar (`recipes.jsonl.fp`) records each record's content
+    fingerprint, so records that duplicate one stored under another id are
+    skipped when reading without hashing anything.
+    """
+
+    def __init__(self, data_dir: str = 'data', filename: str = 'recipes.jsonl'):
+        self.path = os.path.join(data_dir, filename)
+        self.index_path = f'{self.path}.idx'
+        self.fingerprint_path = f'{self.path}.fp'
+        self._index: Optional[Dict[str, Tuple[int, int]]] = None
+        self._fingerprints: Optional[FingerprintIndex] = None
+
+    def size(self) -> int:
+        """Current size of the store in bytes"""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def append(self, recipe_id: str, recipe: Dict[str, Any]) -> int:
+        """Append a recipe record and return its byte offset"""
+        fingerprints = self.fingerprints()
+        line = (json.dumps({'id': recipe_id, 'recipe': recipe}, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(self.path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(line)
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(f'{offset}\t{len(line)}\t{recipe_id}\n')
+        if self._index is not None:
+            self._index[recipe_id] = (offset, len(line))
+        with open(self.fingerprint_path, 'a', encoding='utf-8') as f:
+            self._write_fingerprint(f, fingerprints, offset, len(line), recipe_id, recipe)
+        return offset
+
+    @staticmethod
+    def _write_fingerprint(f, fingerprints: FingerprintIndex, offset: int, length: int,
+                           recipe_id: str, recipe: Dict[str, Any]) -> None:
+        fingerprint, source = record_identity(recipe_id, recipe)
+        f.write(f'{offset}\t{length}\t{fingerprint}\t{source}\t{recipe_id}\n')
+        fingerprints.add(offset, length, fingerprint, source, recipe_id)
+
+    def fingerprints(self) -> FingerprintIndex:
+        """Fingerprints of every record, loaded from the sidecar and caught up with the store"""
+        if self._fingerprints is not None:
+            return self._fingerprints
+
+        fingerprints = FingerprintIndex()
+        if os.path.exists(self.fingerprint_path):
+            with open(self.fingerprint_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    offset, length, fingerprint, source, recipe_id = line.rstrip('\n').split('\t', 4)
+                    fingerprints.add(int(offset), int(length), fingerprint, source, recipe_id)
+
+        mode = 'a'
+        if fingerprints.indexed_to > self.size():
+            # The store was rewritten; fingerprint it from the start
+            fingerprints, mode = FingerprintIndex(), 'w'
+        # Fingerprint records written before the sidecar existed (or by an interrupted append)
+        if fingerprints.indexed_to < self.size() or mode == 'w':
+            with open(self.fingerprint_path, mode, encoding='utf-8') as f:
+                for recipe_id, recipe, offset, end in self._scan(fingerprints.indexed_to):
+                    self._write_fingerprint(f, fingerprints, offset, end - offset, recipe_id, recipe)
+
+        self._fingerprints = fingerprints
+        return fingerprints
+
+    def duplicate_of(self, recipe: Dict[str, Any], recipe_id: str = None) -> Optional[str]:
+        """Id of a stored record with the same source and content, if any"""
+        return self.fingerprints().first.get(record_identity(recipe_id, recipe)[0])
+
+    def source_record(self, recipe: Dict[str, Any], recipe_id: str = None) -> Optional[str]:
+        """Id of the latest record scraped from the same category and URL, if any"""
+        source = record_identity(recipe_id, recipe)[1]
+        return self.fingerprints().sources.get(source) if source else None
+
+    def index(self) -> Dict[str, Tuple[int, int]]:
+        """Map of record id to (offset, length) for the latest version of each record"""
+        if self._index is not None:
+            return self._index
+
+        index, indexed_to = {}, 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    offset, length, recipe_id = line.rstrip('\n').split('\t', 2)
+                    index[recipe_id] = (int(offset), int(length))
+                    indexed_to = max(indexed_to, int(offset) + int(length))
+
+        # Catch up on records written without an index entry (e.g. an interrupted append)
+        if indexed_to < self.size():
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                for recipe_id, _, offset, end in self._scan(indexed_to):
+                    index[recipe_id] = (offset, end - offset)
+                    f.write(f'{offset}\t{end - offset}\t{recipe_id}\n')
+
+        self._index = index
+        return index
+
+    def get(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        """Read a single recipe by id"""
+        location = self.index().get(recipe_id)
+        if location is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(location[0])
+            return json.loads(f.read(location[1]))['recipe']
+
+    def _scan(self, start: int = 0) -> Iterator[Tuple[str, Dict[str, Any], int, int]]:
+        """Yield (id, recipe, offset, end) for every complete record from `start`"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # A torn final write; it will be rewritten or ignored
+                end = offset + len(line)
+                record = json.loads(line)
+                yield record['id'], record['recipe'], offset, end
+                offset = end
+
+    def iter_records(self, start: int = 0, latest_only: bool = True,
+                     unique: bool = True) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+        """
+        Stream (id, recipe, end offset) records from `start` with bounded memory.
+
+        With `latest_only`, records superseded by a later append are skipped.
+        With `unique`, records duplicating one stored under another id are skipped.
+        """
+        index = self.index() if latest_only else None
+        duplicates = self.fingerprints().duplicates if unique else ()
+        for recipe_id, recipe, offset, end in self._scan(start):
+            if offset in duplicates:
+                continue
+            if index is None or index.get(recipe_id, (offset,))[0] == offset:
+                yield recipe_id, recipe, end
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for _, recipe, _ in self.iter_records():
+            yield recipe
+
+
+class LegacyDuplicates:
+    """
+    Spots legacy per-recipe files that duplicate a stored record or a file
+    counted before them, by the fingerprints migrate() uses, so a recipe is
+    counted once whether or not its files have been migrated.
+    """
+
+    def __init__(self, store: RecipeStore):
+        self.stored = store.fingerprints().first
+        self.seen: Set[str] = set()
+
+    def check(self, fingerprint: str) -> bool:
+        """Whether a file with this fingerprint is a duplicate; if not, later ones with it are"""
+        if fingerprint in self.stored or fingerprint in self.seen:
+            return True
+        self.seen.add(fingerprint)
+        return False
+
+
+def recipe_id_category(recipe_id: str) -> str:
+    """Category prefix of a record id (or legacy filename stem)"""
+    return recipe_id.split('_')[0]
+
+
+def legacy_recipe_files(data_dir: str):
+    """Per-recipe JSON files from before the store existed"""
+    return sorted(file for file in Path(data_dir).glob('*.json') if file.name not in DERIVED_FILES)
+
+
+def migrate(data_dir: str = 'data', archive_dir: str = None) -> int:
+    """
+    Append legacy per-recipe files to the store and move them into an archive.
+
+    Record ids are the old filename stems, so category prefixes are kept.
+    Files duplicating a recipe already in the store are archived without
+    being appended.
+    """
+    store = RecipeStore(data_dir)
+    archive_dir = archive_dir or os.path.join(data_dir, 'legacy')
+    os.makedirs(archive_dir, exist_ok=True)
+
+    migrated = 0
+    for file in legacy_recipe_files(data_dir):
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                recipe = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Skipping unreadable file {file}")
+            continue
+        if not isinstance(recipe, dict):
+            continue
+        duplicate = store.duplicate_of(recipe, file.stem)
+        if duplicate is None:
+            store.append(file.stem, recipe)
+            migrated += 1
+        else:
+            print(f"Skipping {file.name}: duplicate of {duplicate}")
+        shutil.move(str(file), os.path.join(archive_dir, file.name))
+    return migrated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the JSONL recipe store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help='move per-recipe JSON files into the store')
+    migrate_parser.add_argument('--data-dir', default='data')
+    migrate_parser.add_argument('--archive-dir', default=None,
+                                help='where migrated files are moved (default: <data-dir>/legacy)')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        count = migrate(args.data_dir, args.archive_dir)
+        print(f"Migrated {count} recipes into {RecipeStore(args.data_dir).path}")
@@ -0,0 +1,254 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Longest wait between attempts, and the longest Retry-After that is honoured
+MAX_BACKOFF = 30.0
+
+# Marks a fetcher thread finishing, on the page queue
+_DONE = object()
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces requests to `rate` per second"""
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds a response's Retry-After header asks to wait, or None if absent or unparseable"""
+    value = response.headers.get('Retry-After', '').strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, date.timestamp() - time.time())
+
+
+class FetchEngine:
+    """
+    Concurrent HTTP fetcher for the scraper.
+
+    Connections are pooled in one requests.Session. A global limit caps
+    the number of requests in flight. Each host additionally gets its own
+    concurrency limit and token-bucket pacing. Transient failures are
+    retried with exponential backoff and jitter, or after the server's
+    Retry-After; a URL whose server asks for more than `max_backoff`
+    seconds fails rather than stalling its fetcher.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, concurrency: int = 8,
+                 per_host_concurrency: int = 2, per_host_rate: float = 2.0, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = MAX_BACKOFF, timeout: float = 10,
+                 session: Optional[requests.Session] = None):
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._global_slots = threading.BoundedSemaphore(concurrency)
+        self._hosts_lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._stats_lock = threading.Lock()
+        self.stats = defaultdict(int)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _host_limits(self, url: str) -> Tuple[threading.BoundedSemaphore, TokenBucket]:
+        host = urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+                self._host_buckets[host] = TokenBucket(self.per_host_rate)
+            return self._host_slots[host], self._host_buckets[host]
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None if the server asks for longer than max_backoff"""
+        requested = retry_after(response) if response is not None else None
+        if requested is not None:
+            return requested if requested <= self.max_backoff else None
+        return min(self.max_backoff, self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Fetch one URL politely, retrying transient failures"""
+        slots, bucket = self._host_limits(url)
+        for attempt in range(self.retries + 1):
+            with slots:
+                # Pace the host before taking a global slot so slow hosts don't starve others
+                bucket.acquire()
+                with self._global_slots:
+                    self._count('requests')
+                    try:
+                        response = self.session.get(url, headers=headers, timeout=self.timeout)
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                        if attempt == self.retries:
+                            raise
+                        response = None
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            if response is not None and attempt == self.retries:
+                response.raise_for_status()
+
+            delay = self._retry_delay(attempt, response)
+            if delay is None:
+                self._count('retry_after_exceeded')
+                response.raise_for_status()
+            self._count('retries')
+            time.sleep(delay)
+
+    def map(self, func: Callable, items: Iterable) -> Iterator:
+        """Run `func` over items on the engine's thread pool, preserving order"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            yield from executor.map(func, items)
+
+
+class Page(NamedTuple):
+    """A fetched page; html is None when its parsed fields are already known"""
+    url: str
+    html: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    parsed: Optional[Dict[str, Any]] = None
+
+
+class ScrapePipeline:
+    """
+    Two-stage fetch/parse pipeline with backpressure.
+
+    Fetcher threads run `fetch` over the URLs and put the pages on a
+    bounded queue, blocking while it is full. The consumer hands each
+    page's HTML to a process pool running `parse`, with at most two pages
+    per worker in flight, so memory stays flat however many URLs there
+    are and parsing never holds up the next download. `parse` must be a
+    module-level function so it can be sent to the workers.
+    """
+
+    def __init__(self, fetch: Callable[[str], Page], parse: Callable[[str, str], Dict[str, Any]],
+                 fetchers: int = 8, parse_workers: Optional[int] = None, queue_size: int = 32):
+        self.fetch = fetch
+        self.parse = parse
+        self.fetchers = fetchers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+
+    def run(self, urls: Iterable[str]) -> Iterator[Tuple[str, Optional[Page], Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Yield (url, page, parsed fields, error) for each URL as it completes.
+
+        Pages whose fields are already known skip the pool. A failed fetch
+        or parse is reported through `error` with the other fields None.
+        """
+        urls = iter(urls)
+        urls_lock = threading.Lock()
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def fetcher():
+            try:
+                while not stop.is_set():
+                    with urls_lock:
+                        url = next(urls, _DONE)
+                    if url is _DONE:
+                        return
+                    try:
+                        pages.put((url, self.fetch(url), None))
+                    except Exception as e:
+                        pages.put((url, None, e))
+            finally:
+                pages.put(_DONE)
+
+        threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(self.fetchers)]
+        pending = deque()
+
+        def finish_oldest():
+            url, page, future = pending.popleft()
+            try:
+                return url, page, future.result(), None
+            except Exception as e:
+                return url, None, None, e
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            # Start the workers before any fetcher thread exists, so none is forked mid-request
+            pool.submit(int).result()
+            for thread in threads:
+                thread.start()
+            try:
+                running = len(threads)
+                while running:
+                    entry = pages.get()
+                    if entry is _DONE:
+                        running -= 1
+                        continue
+                    url, page, error = entry
+                    if error is not None or page.html is None:
+                        yield url, page, page.parsed if page else None, error
+                        continue
+                    pending.append((url, page, pool.submit(self.parse, page.html, page.url)))
+                    while pending and (len(pending) >= self.parse_workers * 2 or pending[0][2].done()):
+                        yield finish_oldest()
+                while pending:
+                    yield finish_oldest()
+            finally:
+                # If the consumer stopped early, unblock fetchers waiting on a full queue
+                stop.set()
+                while any(thread.is_alive() for thread in threads):
+                    try:
+                        pages.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                for _, _, future in pending:
+                    future.cancel()
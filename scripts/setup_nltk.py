@@ -1,18 +1,109 @@
+import argparse
+import json
+import os
+from typing import Any, Dict, Optional
+
 import nltk
+from nltk.tokenize import punkt
+
+# NLTK resources and where nltk.data.find looks for them
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger'
+}
+
+# The Punkt data word_tokenize loads: NLTK 3.8.2 and later read punkt_tab,
+# older releases the pickled punkt
+TOKENIZER_RESOURCE = 'punkt_tab' if hasattr(punkt, 'PunktTokenizer') else 'punkt'
+
+# Precompiled stopwords and lemmas, written into the data directory
+TABLES_FILE = 'nltk_tables.json'
+
+# Resources found or downloaded in this process, so each is checked once
+_available = set()
+
 
 def download_nltk_data():
     """Download required NLTK data"""
-    resources = [
-        'punkt',
-        'stopwords',
-        'wordnet',
-        'averaged_perceptron_tagger',
-        'punkt_tab'
-    ]
-    
-    for resource in resources:
+    for resource in RESOURCES:
         print(f"Downloading {resource}...")
         nltk.download(resource)
+        _available.add(resource)
+
+
+def ensure_resources(*resources: str) -> None:
+    """Make NLTK resources available, downloading only those not installed"""
+    for resource in resources:
+        if resource in _available:
+            continue
+        try:
+            nltk.data.find(RESOURCES[resource])
+        except LookupError:
+            if not nltk.download(resource, quiet=True):
+                raise LookupError(f"NLTK resource '{resource}' is not installed and could not be downloaded; "
+                                  f"run scripts/setup_nltk.py with network access")
+        _available.add(resource)
+
+
+def build_tables(data_dir: str = 'data') -> Dict[str, Any]:
+    """
+    Precompute the English stopwords and the WordNet lemma of every word in
+    the recipes in data_dir, so the processor can start without loading
+    NLTK's corpora
+    """
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+    from process_ingredients import IngredientProcessor
+
+    ensure_resources(TOKENIZER_RESOURCE, 'stopwords', 'wordnet')
+    words = set()
+    for recipe in IngredientProcessor(data_dir).iter_recipes():
+        for ingredient in recipe['ingredients']:
+            words.update(word_tokenize(ingredient.lower()))
+
+    lemmatizer = WordNetLemmatizer()
+    return {
+        'nltk': nltk.__version__,
+        'stopwords': sorted(stopwords.words('english')),
+        'lemmas': {word: lemmatizer.lemmatize(word) for word in sorted(words)}
+    }
+
+
+def save_tables(data_dir: str = 'data') -> None:
+    tables = build_tables(data_dir)
+    output_path = os.path.join(data_dir, TABLES_FILE)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(tables, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Saved {len(tables['stopwords'])} stopwords and {len(tables['lemmas'])} lemmas to {output_path}")
+
+
+def load_tables(data_dir: str = 'data') -> Optional[Dict[str, Any]]:
+    """
+    The precompiled tables for data_dir, or None if they haven't been built
+    or were built with another NLTK release, whose lemmas may differ
+    """
+    path = os.path.join(data_dir, TABLES_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            tables = json.load(f)
+    except FileNotFoundError:
+        return None
+    if tables.get('nltk') != nltk.__version__:
+        print(f"Ignoring {path}: built with NLTK {tables.get('nltk')}, running {nltk.__version__}; "
+              f"rebuild it with scripts/setup_nltk.py --skip-download")
+        return None
+    return tables
+
 
 if __name__ == "__main__":
-    download_nltk_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Download NLTK data and precompile the stopword/lemma tables')
+    parser.add_argument('--data-dir', default='data', help='recipe data directory to build the tables from')
+    parser.add_argument('--skip-download', action='store_true', help='only rebuild the tables')
+    args = parser.parse_args()
+    if not args.skip_download:
+        download_nltk_data()
+    save_tables(args.data_dir)
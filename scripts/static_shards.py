@@ -0,0 +1,148 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# Read by the frontend; bump when the manifest or shard layout changes
+SHARDS_FORMAT = 'shards-v1'
+
+# Entries in the top-N shard; the dashboard charts the top 15
+TOP_N = 50
+
+# Ingredients per category page
+CATEGORY_PAGE_SIZE = 250
+
+# Page category for ingredients that have none
+UNCATEGORIZED = 'uncategorized'
+
+
+def _slug(value: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-') or 'x'
+
+
+class ShardWriter:
+    """
+    Writes JSON shards named by their content hash into base_dir/subdir.
+
+    A shard whose file already exists has the same content and is left
+    alone, so rebuilds only write shards that changed. `on_write` is
+    called with each newly written path, e.g. to add compressed siblings.
+    """
+
+    def __init__(self, base_dir: Path, subdir: str = 'shards',
+                 on_write: Optional[Callable[[Path], None]] = None):
+        self.subdir = subdir
+        self.shard_dir = base_dir / subdir
+        self.on_write = on_write
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name: str, payload: Any) -> str:
+        """Write a shard and return its path relative to base_dir"""
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        filename = f'{_slug(name)}.{hashlib.sha256(body).hexdigest()[:16]}.json'
+        path = self.shard_dir / filename
+        if path.exists():
+            self.skipped.append(filename)
+        else:
+            tmp_path = path.with_name(filename + '.tmp')
+            tmp_path.write_bytes(body)
+            tmp_path.replace(path)
+            if self.on_write is not None:
+                self.on_write(path)
+            self.written.append(filename)
+        return f'{self.subdir}/{filename}'
+
+    def prune(self, keep: Iterable[str]) -> List[str]:
+        """Delete shards (and their siblings) whose paths aren't in `keep`, returning the removed names"""
+        keep = set(keep)
+        removed = []
+        for path in self.shard_dir.iterdir():
+            base = path.name.split('.json', 1)[0] + '.json'
+            if f'{self.subdir}/{base}' not in keep:
+                path.unlink()
+                if base == path.name:
+                    removed.append(base)
+        return removed
+
+
+def category_pages(ingredients: Dict[str, Dict[str, Any]], by_count: List[str]) -> Dict[str, List[List[str]]]:
+    """
+    Split ingredients into pages by category, in count order.
+
+    An ingredient appears under each of its categories, matching
+    /api/ingredients/category/<category>.
+    """
+    members: Dict[str, List[str]] = {}
+    for name in by_count:
+        for category in ingredients[name]['categories'] or [UNCATEGORIZED]:
+            members.setdefault(category, []).append(name)
+    return {
+        category: [names[i:i + CATEGORY_PAGE_SIZE] for i in range(0, len(names), CATEGORY_PAGE_SIZE)]
+        for category, names in sorted(members.items())
+    }
+
+
+def build_shards(processed: Dict[str, Any], by_count: List[str], heatmap_data: Dict[str, Any],
+                 graph_data: Dict[str, Any], writer: ShardWriter) -> Dict[str, Any]:
+    """
+    Write one shard per dashboard view and return the manifest.
+
+    - summary: totals, ingredients by category and unit totals
+    - top: the TOP_N most common ingredients
+    - heatmap: the precomputed relationship submatrix
+    - graph: the pruned recipe/ingredient network
+    - names: every ingredient name and count, in count order, with the
+      index of one category page holding its full record
+    - pages: full ingredient records, grouped by category
+    """
+    ingredients = processed['ingredients']
+    stats = processed.get('stats', {})
+
+    shards = {
+        'summary': writer.write('summary', {
+            'total_ingredients': stats.get('total_ingredients', len(ingredients)),
+            'total_recipes': stats.get('total_recipes'),
+            'ingredients_by_category': stats.get('ingredients_by_category', {}),
+            'most_common_units': stats.get('most_common_units', {})
+        }),
+        'top': writer.write('top', {
+            'ingredients': [
+                {'ingredient': name, 'count': ingredients[name]['count'],
+                 'categories': ingredients[name]['categories']}
+                for name in by_count[:TOP_N]
+            ]
+        }),
+        'heatmap': writer.write('heatmap', heatmap_data),
+        'graph': writer.write('graph', graph_data)
+    }
+
+    pages, page_of = [], {}
+    for category, chunks in category_pages(ingredients, by_count).items():
+        for number, names in enumerate(chunks):
+            for name in names:
+                page_of.setdefault(name, len(pages))
+            pages.append({
+                'category': category,
+                'file': writer.write(f'category-{category}-{number}',
+                                     {'ingredients': {name: ingredients[name] for name in names}})
+            })
+
+    shards['names'] = writer.write('names', {
+        'names': by_count,
+        'counts': [ingredients[name]['count'] for name in by_count],
+        'pages': [page_of[name] for name in by_count]
+    })
+
+    return {
+        'format': SHARDS_FORMAT,
+        'shards': shards,
+        'pages': pages
+    }
+
+
+def manifest_files(manifest: Dict[str, Any]) -> Set[str]:
+    """Every shard file a manifest references"""
+    return set(manifest['shards'].values()) | {page['file'] for page in manifest['pages']}
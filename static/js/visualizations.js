@@ -6,25 +6,65 @@ const config = {
     colors: d3.schemeCategory10
 };
 
+// The Flask API is only there in local development; GitHub Pages serves prebuilt shards
+const isLocal = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1';
+
+// Expand the compact encoding (scripts/compact_format.py) into the
+// processed_ingredients.json structure
+function decodeCompact(compact) {
+    if (compact.format !== 'compact-v1') {
+        throw new Error(`Unsupported data format: ${compact.format}`);
+    }
+    const recipes = compact.recipes.titles.map((title, i) => ({
+        title,
+        category: compact.recipe_categories[compact.recipes.categories[i]] || null
+    }));
+    const columns = compact.ingredients;
+    const ingredients = {};
+    columns.names.forEach((name, i) => {
+        const ingredient = {
+            count: columns.count[i],
+            recipes: columns.recipes[i].map(r => recipes[r]),
+            categories: columns.categories[i].map(c => compact.ingredient_categories[c])
+        };
+        if (columns.common_quantities) ingredient.common_quantities = columns.common_quantities[i];
+        if (columns.common_units) ingredient.common_units = columns.common_units[i];
+        ingredients[name] = ingredient;
+    });
+    const stats = { ...compact.stats };
+    if (stats.most_common_ingredients) {
+        stats.most_common_ingredients = stats.most_common_ingredients.map(i => ({
+            ingredient: columns.names[i],
+            count: columns.count[i],
+            categories: ingredients[columns.names[i]].categories
+        }));
+    }
+    return { ingredients, stats };
+}
+
 // Main visualization class
 class RecipeVisualizer {
     constructor() {
+        // Local only: the full dataset, fetched on first use by the category view
         this.data = null;
+        // Static build only: the shard manifest and the shards fetched so far
+        this.manifest = null;
+        this.shards = {};
         this.currentView = 'categories';
         this.initializeUI();
     }
 
     async loadData() {
         try {
-            // Check if we're running locally (development) or on GitHub Pages (production)
-            const isLocal = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1';
-            const url = isLocal ? '/api/recipes' : 'data/processed_ingredients.json';
-            
-            const response = await fetch(url);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+            // Locally each view queries the Flask API for just what it shows
+            if (!isLocal) {
+                // Shards are content-hashed and never change, so only the manifest is revalidated;
+                // each view then fetches just the shards it needs
+                this.manifest = await this.fetchJSON('data/manifest.json', { cache: 'no-cache' });
+                if (this.manifest.format !== 'shards-v1') {
+                    throw new Error(`Unsupported data format: ${this.manifest.format}`);
+                }
             }
-            this.data = await response.json();
             this.renderCurrentView();
         } catch (error) {
             console.error('Error loading data:', error);
@@ -65,6 +105,29 @@ class RecipeVisualizer {
             .attr('value', d => d.value)
             .text(d => d.text);
 
+        // Ingredient search with autocomplete
+        const search = d3.select('.filters')
+            .append('div')
+            .attr('class', 'ingredient-search');
+
+        search.append('label')
+            .attr('class', 'form-label')
+            .attr('for', 'ingredient-search')
+            .text('Find Ingredient');
+
+        search.append('input')
+            .attr('id', 'ingredient-search')
+            .attr('class', 'form-control mb-3')
+            .attr('type', 'search')
+            .attr('list', 'ingredient-suggestions')
+            .attr('autocomplete', 'off')
+            .attr('placeholder', 'e.g. garlic')
+            .on('input', (event) => this.suggestIngredients(event.target.value))
+            .on('change', (event) => this.showIngredient(event.target.value));
+
+        search.append('datalist')
+            .attr('id', 'ingredient-suggestions');
+
         // Remove loading indicator from previous version
         d3.select('.loading').remove();
         
@@ -107,7 +170,7 @@ class RecipeVisualizer {
     }
 
     renderCurrentView() {
-        if (!this.data) return;
+        if (!isLocal && !this.manifest) return;
         
         // Clear previous visualization
         this.chart.html('');
@@ -128,8 +191,17 @@ class RecipeVisualizer {
         }
     }
 
-    renderCategoryDistribution() {
-        const stats = this.data.stats;
+    async renderCategoryDistribution() {
+        let stats;
+        try {
+            stats = await this.summaryStats();
+        } catch (error) {
+            console.error('Error loading summary:', error);
+            this.showError('Failed to load summary: ' + error.message);
+            return;
+        }
+        if (this.currentView !== 'categories') return;
+
         const categories = Object.entries(stats.ingredients_by_category)
             .map(([category, count]) => ({ category, count }))
             .sort((a, b) => b.count - a.count);
@@ -182,9 +254,18 @@ class RecipeVisualizer {
             .text('Number of Ingredients');
     }
 
-    renderCommonIngredients() {
-        const stats = this.data.stats;
-        const ingredients = stats.most_common_ingredients
+    async renderCommonIngredients() {
+        let top;
+        try {
+            top = await this.topIngredients();
+        } catch (error) {
+            console.error('Error loading top ingredients:', error);
+            this.showError('Failed to load top ingredients: ' + error.message);
+            return;
+        }
+        if (this.currentView !== 'common') return;
+
+        const ingredients = top
             .slice(0, 15)  // Show top 15 ingredients
             .sort((a, b) => a.count - b.count);  // Sort ascending for horizontal bars
         
@@ -232,7 +313,134 @@ class RecipeVisualizer {
             .text('Number of Recipes');
     }
 
-    renderIngredientHeatmap() {
+    async fetchJSON(url, options) {
+        const response = await fetch(url, options);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    }
+
+    shard(path) {
+        // Each shard is fetched at most once; failed fetches can be retried
+        if (!this.shards[path]) {
+            this.shards[path] = this.fetchJSON(`data/${path}`).catch(error => {
+                delete this.shards[path];
+                throw error;
+            });
+        }
+        return this.shards[path];
+    }
+
+    viewData(apiPath, shardName) {
+        // Use the Flask API locally and the view's shard on GitHub Pages
+        return isLocal ? this.fetchJSON(apiPath) : this.shard(this.manifest.shards[shardName]);
+    }
+
+    async summaryStats() {
+        if (!isLocal) return this.shard(this.manifest.shards.summary);
+        // The per-category totals only ship with the full dataset, so it is
+        // fetched once, and only when the category view is shown
+        if (!this.data) {
+            this.data = this.fetchJSON('/api/recipes?format=compact').then(decodeCompact).catch(error => {
+                this.data = null;
+                throw error;
+            });
+        }
+        return (await this.data).stats;
+    }
+
+    async topIngredients() {
+        if (isLocal) {
+            const params = new URLSearchParams({ n: 15, fields: 'count,categories' });
+            return (await this.fetchJSON(`/api/ingredients/top?${params}`)).items;
+        }
+        return (await this.shard(this.manifest.shards.top)).ingredients;
+    }
+
+    async ingredientRecord(name) {
+        if (isLocal) {
+            const response = await fetch(`/api/ingredients/${encodeURIComponent(name)}`);
+            if (response.status === 404) return undefined;
+            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+            return response.json();
+        }
+        // The names shard says which category page holds the full record
+        const index = await this.shard(this.manifest.shards.names);
+        const i = index.names.indexOf(name);
+        if (i < 0) return undefined;
+        const page = await this.shard(this.manifest.pages[index.pages[i]].file);
+        return page.ingredients[name];
+    }
+
+    async searchIngredients(query, limit = 10) {
+        if (isLocal) {
+            const params = new URLSearchParams({ q: query, limit, fields: 'count' });
+            return (await this.fetchJSON(`/api/ingredients/search?${params}`)).items;
+        }
+
+        // No API on GitHub Pages: prefix then substring matches from the names
+        // shard, which is already in count order
+        const q = query.trim().toLowerCase();
+        if (!q || !this.manifest) return [];
+        const { names, counts } = await this.shard(this.manifest.shards.names);
+        const prefix = [];
+        const substring = [];
+        names.forEach((name, i) => {
+            if (name.startsWith(q)) prefix.push(i);
+            else if (name.includes(q)) substring.push(i);
+        });
+        return prefix.concat(substring)
+            .slice(0, limit)
+            .map(i => ({ ingredient: names[i], count: counts[i] }));
+    }
+
+    async suggestIngredients(query) {
+        // Only the latest keystroke's results are shown
+        const token = this.searchToken = (this.searchToken || 0) + 1;
+        const items = query.trim() ? await this.searchIngredients(query) : [];
+        if (token !== this.searchToken) return;
+
+        const options = d3.select('#ingredient-suggestions')
+            .selectAll('option')
+            .data(items, d => d.ingredient);
+        options.exit().remove();
+        options.enter()
+            .append('option')
+            .merge(options)
+            .attr('value', d => d.ingredient)
+            .text(d => `${d.count} recipes`);
+    }
+
+    async showIngredient(name) {
+        let record;
+        try {
+            record = await this.ingredientRecord(name);
+        } catch (error) {
+            console.error('Error loading ingredient:', error);
+            return;
+        }
+        if (!record) return;
+
+        const details = d3.select('#recipe-details').html('');
+        details.append('h2')
+            .attr('class', 'card-title')
+            .text(name);
+        details.append('p')
+            .attr('class', 'card-text')
+            .text(`Used ${record.count} times` +
+                  (record.categories.length ? ` · ${record.categories.join(', ')}` : ''));
+        details.append('ul')
+            .attr('class', 'list-group list-group-flush')
+            .selectAll('li')
+            .data([...new Map(record.recipes.map(r => [r.title, r])).values()])
+            .enter()
+            .append('li')
+            .attr('class', 'list-group-item')
+            .text(d => d.category ? `${d.title} (${d.category})` : d.title);
+    }
+
+    async renderIngredientHeatmap() {
         // Adjust margins for rotated labels
         const localMargin = {
             top: config.margin.top,
@@ -241,41 +449,26 @@ class RecipeVisualizer {
             left: config.margin.left + 100      // More space for left labels
         };
 
-        // Get top ingredients with their categories
-        const topIngredients = this.data.stats.most_common_ingredients
-            .slice(0, 15)  // Show top 15 ingredients
-            .map(d => ({
-                name: d.ingredient,
-                count: d.count,
-                categories: d.categories
-            }));
-
-        // Create relationship matrix based on shared categories and recipes
-        const matrix = [];
-        topIngredients.forEach((ing1, i) => {
-            matrix[i] = new Array(topIngredients.length).fill(0);
-            topIngredients.forEach((ing2, j) => {
-                if (i !== j) {
-                    // Calculate relationship score based on:
-                    // 1. Number of shared categories
-                    const sharedCategories = ing1.categories.filter(cat => 
-                        ing2.categories.includes(cat)).length;
-                    
-                    // 2. Co-occurrence in recipes
-                    const ing1Recipes = new Set(
-                        this.data.ingredients[ing1.name].recipes.map(r => r.title)
-                    );
-                    const ing2Recipes = new Set(
-                        this.data.ingredients[ing2.name].recipes.map(r => r.title)
-                    );
-                    const sharedRecipes = [...ing1Recipes].filter(recipe => 
-                        ing2Recipes.has(recipe)).length;
-                    
-                    // Combine scores (weighted average)
-                    matrix[i][j] = (sharedCategories * 2 + sharedRecipes) / 3;
-                }
-            });
-        });
+        // The relationship matrix for the top 15 ingredients is precomputed server-side
+        let heatmap;
+        try {
+            heatmap = this.heatmap || await this.viewData('/api/cooccurrence?k=15', 'heatmap');
+            this.heatmap = heatmap;
+        } catch (error) {
+            console.error('Error loading heatmap:', error);
+            this.showError('Failed to load heatmap: ' + error.message);
+            return;
+        }
+        if (this.currentView !== 'heatmap') return;
+
+        const topIngredients = heatmap.ingredients.map((d, i) => ({
+            index: i,
+            name: d.ingredient,
+            count: d.count,
+            categories: d.categories,
+            topUnits: d.top_units
+        }));
+        const matrix = heatmap.score;
 
         // Update title
         d3.select('.chart-title').text('Ingredient Relationships Heatmap');
@@ -349,22 +542,11 @@ class RecipeVisualizer {
             const sharedCategories = d.ing1.categories.filter(cat => 
                 d.ing2.categories.includes(cat));
 
-            const ing1Data = this.data.ingredients[d.ing1.name];
-            const ing2Data = this.data.ingredients[d.ing2.name];
+            // Shared recipe counts and examples come with the precomputed matrix
+            const sharedCount = heatmap.shared_recipes[d.ing1.index][d.ing2.index];
+            const sharedExamples = heatmap.shared_examples[d.ing1.index][d.ing2.index];
 
-            // Safely get recipes
-            const ing1Recipes = ing1Data ? new Set(ing1Data.recipes.map(r => r.title)) : new Set();
-            const ing2Recipes = ing2Data ? new Set(ing2Data.recipes.map(r => r.title)) : new Set();
-            const sharedRecipes = [...ing1Recipes].filter(recipe => ing2Recipes.has(recipe));
-
-            // Get the most common units for each ingredient (with safety checks)
-            const getTopUnits = (ingData) => {
-                if (!ingData || !ingData.common_units) return [];
-                return Object.entries(ingData.common_units || {})
-                    .sort((a, b) => b[1] - a[1])
-                    .slice(0, 2)
-                    .map(([unit, count]) => `${unit} (${count}x)`);
-            };
+            const getTopUnits = (ing) => ing.topUnits.map(([unit, count]) => `${unit} (${count}x)`);
 
             // Format the tooltip content with more details
             let tooltipContent = `
@@ -388,17 +570,17 @@ class RecipeVisualizer {
                             ${sharedCategories.map(cat => `• ${cat}`).join('<br>')}
                         </div>
                         ` : ''}
-                        ${sharedRecipes.length ? `
+                        ${sharedCount ? `
                         <div class="tooltip-section">
-                            <span class="tooltip-label">Co-occur in ${sharedRecipes.length} recipes:</span><br>
-                            ${sharedRecipes.slice(0, 3).map(recipe => `• ${recipe}`).join('<br>')}
-                            ${sharedRecipes.length > 3 ? '<br>• ...' : ''}
+                            <span class="tooltip-label">Co-occur in ${sharedCount} recipes:</span><br>
+                            ${sharedExamples.map(recipe => `• ${recipe}`).join('<br>')}
+                            ${sharedCount > sharedExamples.length ? '<br>• ...' : ''}
                         </div>
                         ` : ''}
                         <div class="tooltip-section">
                             <span class="tooltip-label">Common Units:</span><br>
-                            • ${d.ing1.name}: ${getTopUnits(ing1Data).join(', ') || 'N/A'}<br>
-                            • ${d.ing2.name}: ${getTopUnits(ing2Data).join(', ') || 'N/A'}
+                            • ${d.ing1.name}: ${getTopUnits(d.ing1).join(', ') || 'N/A'}<br>
+                            • ${d.ing2.name}: ${getTopUnits(d.ing2).join(', ') || 'N/A'}
                         </div>
                     </div>
                 </div>
@@ -505,36 +687,25 @@ class RecipeVisualizer {
             .text('High Relationship');
     }
 
-    renderRecipeNetwork() {
+    async renderRecipeNetwork() {
         // Update title
         d3.select('.chart-title').text('Recipe-Ingredient Connections');
         
-        // Create nodes for recipes and ingredients
-        const nodes = [];
-        const links = [];
-        const recipes = new Set();
-        const ingredients = new Set();
-        
-        // Process data to create network
-        Object.entries(this.data.ingredients).forEach(([ingredient, data]) => {
-            ingredients.add(ingredient);
-            data.recipes.forEach(recipe => {
-                recipes.add(recipe.title);
-                links.push({
-                    source: ingredient,
-                    target: recipe.title,
-                    value: 1
-                });
-            });
-        });
+        // The graph is precomputed and pruned server-side to keep the simulation small
+        let graph;
+        try {
+            graph = this.graph || await this.viewData('/api/graph?min_degree=2&top_k=300', 'graph');
+            this.graph = graph;
+        } catch (error) {
+            console.error('Error loading graph:', error);
+            this.showError('Failed to load graph: ' + error.message);
+            return;
+        }
+        if (this.currentView !== 'network') return;
         
-        // Create nodes array
-        recipes.forEach(recipe => {
-            nodes.push({ id: recipe, type: 'recipe' });
-        });
-        ingredients.forEach(ingredient => {
-            nodes.push({ id: ingredient, type: 'ingredient' });
-        });
+        // Copy so the simulation's positions don't leak into the cached response
+        const nodes = graph.nodes.map(d => ({ ...d }));
+        const links = graph.links.map(d => ({ ...d }));
         
         // Create force simulation
         const simulation = d3.forceSimulation(nodes)
@@ -566,7 +737,7 @@ class RecipeVisualizer {
             .data(nodes)
             .enter()
             .append('text')
-            .text(d => d.id)
+            .text(d => d.label)
             .style('font-size', '8px')
             .style('text-anchor', 'middle')
             .style('dominant-baseline', 'middle');
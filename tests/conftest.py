@@ -0,0 +1,48 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+import process_recipes
+from build_index import save_index
+
+RECIPES = [
+    {'title': 'Pancakes', 'category': 'breakfast', 'url': 'https://example.com/pancakes',
+     'ingredients': ['200g plain flour', '2 eggs', '300ml milk', 'butter']},
+    {'title': 'Omelette', 'category': 'breakfast', 'url': 'https://example.com/omelette',
+     'ingredients': ['3 eggs', 'butter', 'salt']},
+    {'title': 'Pad thai', 'category': 'asian', 'url': 'https://example.com/pad-thai',
+     'ingredients': ['200g rice noodles', '2 eggs', '1 tbsp fish sauce', 'salt']},
+    {'title': 'Shortbread', 'category': 'desserts', 'url': 'https://example.com/shortbread',
+     'ingredients': ['250g butter', '350g plain flour', '100g caster sugar']}
+]
+
+
+def write_processed(data_dir: Path, mmap_index: bool = True) -> dict:
+    """Process RECIPES and write the files the API serves into data_dir"""
+    ingredient_data, category_counts = process_recipes.process_ingredients(
+        dict(recipe) for recipe in RECIPES)
+    processed = process_recipes.create_visualization_data(ingredient_data, category_counts)
+    with open(data_dir / 'processed_ingredients.json', 'w', encoding='utf-8') as f:
+        json.dump(processed, f)
+    if mmap_index:
+        save_index(processed, str(data_dir / 'ingredients.idx'))
+    return processed
+
+
+@pytest.fixture(params=[True, False], ids=['mmap', 'json'])
+def data_dir(request, tmp_path):
+    """A data directory with processed data, served through the mmap index or the JSON fallback"""
+    write_processed(tmp_path, mmap_index=request.param)
+    return tmp_path
+
+
+@pytest.fixture
+def client(data_dir):
+    from app import create_app
+    return create_app(str(data_dir)).test_client()
@@ -0,0 +1,89 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from app import create_app
+from ingredient_index import COUNT_KEY, NAME_KEY, IngredientIndex, decode_cursor, encode_cursor
+
+
+def cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(('butter',)), NAME_KEY) == ('butter',)
+    assert decode_cursor(encode_cursor((-3, 'eggs')), COUNT_KEY) == (-3, 'eggs')
+
+
+@pytest.mark.parametrize('value, key_types', [
+    ([1], NAME_KEY),
+    (['a', 'b'], NAME_KEY),
+    ('butter', NAME_KEY),
+    ({'a': 1}, NAME_KEY),
+    (['eggs', -3], COUNT_KEY),
+    ([True, 'eggs'], COUNT_KEY),
+    ([-3.5, 'eggs'], COUNT_KEY),
+])
+def test_cursor_of_wrong_shape_is_rejected(value, key_types):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor(value), key_types)
+
+
+def test_listing_pages_through_every_ingredient(client):
+    names, next_cursor = [], None
+    while True:
+        query = f'/api/ingredients?limit=2' + (f'&cursor={next_cursor}' if next_cursor else '')
+        page = client.get(query).get_json()
+        names += [item['ingredient'] for item in page['items']]
+        next_cursor = page['next_cursor']
+        if next_cursor is None:
+            break
+    assert names == sorted(names)
+    assert len(names) == page['total']
+
+
+@pytest.mark.parametrize('path', ['/api/ingredients', '/api/ingredients/category/breakfast'])
+@pytest.mark.parametrize('value', [[1], ['a', 'b'], 'x', [None, None], [[], 'a']])
+def test_malformed_cursor_is_a_bad_request(client, path, value):
+    response = client.get(f'{path}?cursor={cursor(value)}')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+
+@pytest.mark.parametrize('path', ['/api/ingredients', '/api/ingredients/category/breakfast'])
+def test_undecodable_cursor_is_a_bad_request(client, path):
+    assert client.get(f'{path}?cursor=not-base64!').status_code == 400
+
+
+def test_bodies_are_compressed_on_first_request(data_dir):
+    app = create_app(str(data_dir))
+    files = app.extensions['data_files']
+    client = app.test_client()
+    plain = client.get('/api/recipes').get_data()
+    assert files.recipes.get()._encoded == {}
+
+    response = client.get('/api/recipes', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain
+    assert set(files.recipes.get()._encoded) == {'gzip'}
+
+    # Caches that only back an index are never compressed
+    client.get('/api/ingredients/top', headers={'Accept-Encoding': 'gzip, br'})
+    assert files.fallback_index.get()._encoded == {}
+
+
+def test_preload_compresses_the_served_bodies(data_dir):
+    files = create_app(str(data_dir), preload=True).extensions['data_files']
+    assert files.recipes.get()._encoded
+
+
+@pytest.mark.parametrize('path', ['/api/ingredients', '/api/ingredients/category/breakfast'])
+def test_errors_in_the_index_are_server_errors(client, path, monkeypatch):
+    def corrupt(*args, **kwargs):
+        raise ValueError('bad record')
+    monkeypatch.setattr(IngredientIndex, 'page', corrupt)
+    response = client.get(path)
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'bad record'}
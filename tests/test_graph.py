@@ -0,0 +1,31 @@
+import pytest
+
+from app import DEFAULT_GRAPH_LINKS, MAX_GRAPH_LINKS, create_app
+from recipe_graph import save_recipe_graph
+
+
+@pytest.fixture
+def client(tmp_path):
+    """An app over a graph with more links than MAX_GRAPH_LINKS"""
+    ingredient_data = {
+        f'ingredient {i}': {
+            'count': 3,
+            'recipes': [{'title': f'recipe {(i + j) % 1000}', 'category': 'mains'} for j in range(3)],
+            'categories': {'mains': 3}
+        }
+        for i in range(1000)
+    }
+    save_recipe_graph(ingredient_data, str(tmp_path / 'recipe_graph.json'))
+    return create_app(str(tmp_path)).test_client()
+
+
+def test_unparameterised_graph_is_bounded(client):
+    graph = client.get('/api/graph').get_json()
+    assert graph['total_links'] == 3000
+    assert len(graph['links']) == DEFAULT_GRAPH_LINKS
+    assert len(graph['nodes']) <= 2 * DEFAULT_GRAPH_LINKS
+
+
+@pytest.mark.parametrize('top_k, links', [(10, 10), (10 ** 6, MAX_GRAPH_LINKS), (0, 1), (-5, 1)])
+def test_top_k_is_clamped(client, top_k, links):
+    assert len(client.get(f'/api/graph?top_k={top_k}').get_json()['links']) == links
@@ -0,0 +1,73 @@
+import pytest
+
+from ingredient_parser import IngredientLineParser, format_quantity, parse_quantities
+
+UNITS = ['cup', 'cups', 'tbsp', 'g']
+CATEGORIES = {
+    'baking': ['flour', 'sugar', 'cup'],
+    'dairy': ['milk', 'butter'],
+    'protein': ['eggs']
+}
+
+
+@pytest.fixture
+def parser():
+    return IngredientLineParser(UNITS, CATEGORIES)
+
+
+@pytest.mark.parametrize('text, quantities', [
+    ('2 eggs', [2]),
+    ('½ cup milk', [0.5]),
+    ('1½ cups sugar', [1.5]),
+    ('1 ½ cups sugar', [1.5]),
+    ('1 1/2 cups flour', [1.5]),
+    ('1-1/2 cups flour', [1.5]),
+    ('3/4 cup milk', [0.75]),
+    ('1.5 cups milk', [1.5]),
+    ('.5 tbsp butter', [0.5]),
+    ('1-2 tbsp butter', [1, 2]),
+    ('2–3 eggs', [2, 3]),
+    ('½-1 cup milk', [0.5, 1]),
+    ('1/0 cup flour', []),
+    ('salt', [])
+])
+def test_quantities(text, quantities):
+    assert parse_quantities(text) == quantities
+
+
+@pytest.mark.parametrize('value, key', [(2.0, '2'), (0.5, '0.5'), (1 / 3, '0.333'), (1.25, '1.25')])
+def test_format_quantity(value, key):
+    assert format_quantity(value) == key
+
+
+def test_token_table_marks_units_and_categories(parser):
+    assert parser.terms['cups'] == (True, ())
+    # A unit that is also a category term
+    assert parser.terms['cup'] == (True, ('baking',))
+    assert parser.terms['butter'] == (False, ('dairy',))
+
+
+def test_categories_keep_definition_order(parser):
+    units, categories = parser.match(['eggs', 'cups', 'milk', 'flour'])
+    assert units == ['cups']
+    assert categories == ['baking', 'dairy', 'protein']
+    assert parser.match(['salt']) == ([], ['other'])
+
+
+@pytest.mark.parametrize('words', [
+    ['1-1/2', 'cups', 'flour'],
+    ['1', '½', 'cups', 'flour'],
+    ['1½', 'cups', 'flour'],
+    ['2–3', 'cups', 'flour']
+])
+def test_quantity_tokens_are_left_out_of_the_name(parser, words):
+    assert parser.name_words(words, {'of'}) == ['flour']
+
+
+def test_parse(parser):
+    line = parser.parse('1-1/2 cups of plain flour', ['1-1/2', 'cups', 'of', 'plain', 'flour'], {'of'},
+                        lemmatize=str.upper)
+    assert line.quantities == ('1.5',)
+    assert line.units == ('cups',)
+    assert line.categories == ('baking',)
+    assert line.main_ingredient == 'PLAIN FLOUR'
@@ -0,0 +1,33 @@
+import process_recipes
+from conftest import RECIPES
+from ingredient_stats import ingredient_stats
+
+# Keys of IngredientProcessor.get_ingredient_stats before it was vectorized
+STATS_KEYS = {'total_ingredients', 'total_recipes', 'ingredients_by_category',
+              'most_common_ingredients', 'most_common_units', 'category_distribution'}
+
+
+def aggregates() -> tuple:
+    ingredient_data, category_counts = process_recipes.process_ingredients(dict(recipe) for recipe in RECIPES)
+    for data in ingredient_data.values():
+        data['common_units'] = {}
+    return ingredient_data, category_counts
+
+
+def test_schema_and_category_totals():
+    ingredient_data, category_counts = aggregates()
+    stats = ingredient_stats(ingredient_data, len(RECIPES))
+    assert set(stats) == STATS_KEYS
+    # Ingredient lines per category, as process_recipes.py counts them
+    assert stats['category_distribution'] == dict(category_counts)
+    # Distinct ingredients per category
+    assert stats['ingredients_by_category'] == {'asian': 4, 'breakfast': 5, 'desserts': 3}
+
+
+def test_every_ingredient_is_ranked_by_default():
+    ingredient_data, _ = aggregates()
+    ranked = ingredient_stats(ingredient_data, len(RECIPES))['most_common_ingredients']
+    assert len(ranked) == len(ingredient_data)
+    assert [item['count'] for item in ranked] == sorted((data['count'] for data in ingredient_data.values()),
+                                                        reverse=True)
+    assert len(ingredient_stats(ingredient_data, len(RECIPES), top_k=2)['most_common_ingredients']) == 2
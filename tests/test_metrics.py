@@ -0,0 +1,95 @@
+import re
+
+import pytest
+
+from app import create_app
+from conftest import write_processed
+from metrics import LATENCY_BUCKETS
+
+SAMPLE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def scrape(client) -> dict:
+    """Samples from /metrics as {(name, frozenset of label pairs): value}"""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith('#'):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        samples[(name, frozenset(LABEL.findall(labels)))] = float(value)
+    return samples
+
+
+def sample(samples: dict, name: str, **labels) -> float:
+    return samples.get((name, frozenset(labels.items())), 0)
+
+
+@pytest.fixture
+def app(tmp_path):
+    write_processed(tmp_path)
+    return create_app(str(tmp_path))
+
+
+def test_status_counts_by_route(app):
+    client = app.test_client()
+    first = client.get('/api/recipes')
+    assert client.get('/api/recipes', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/api/ingredients/butter').status_code == 200
+    assert client.get('/api/ingredients/saffron').status_code == 404
+    assert client.get('/no/such/page').status_code == 404
+
+    samples = scrape(client)
+    detail = '/api/ingredients/<path:name>'
+    assert sample(samples, 'http_requests_total', method='GET', route='/api/recipes', status='200') == 1
+    assert sample(samples, 'http_requests_total', method='GET', route='/api/recipes', status='304') == 1
+    assert sample(samples, 'http_requests_total', method='GET', route=detail, status='200') == 1
+    assert sample(samples, 'http_requests_total', method='GET', route=detail, status='404') == 1
+    assert sample(samples, 'http_requests_total', method='GET', route='unmatched', status='404') == 1
+
+
+def test_latency_histogram(app):
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/api/ingredients/top')
+
+    samples = scrape(client)
+    route = {'method': 'GET', 'route': '/api/ingredients/top'}
+    bounds = [repr(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+    buckets = [sample(samples, 'http_request_duration_seconds_bucket', le=le, **route) for le in bounds]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == 3
+    assert sample(samples, 'http_request_duration_seconds_count', **route) == 3
+    assert 0 < sample(samples, 'http_request_duration_seconds_sum', **route) <= 3 * LATENCY_BUCKETS[-1]
+
+
+def test_response_bytes(app):
+    client = app.test_client()
+    full = client.get('/api/recipes')
+    compressed = client.get('/api/recipes', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    client.get('/api/recipes', headers={'If-None-Match': full.headers['ETag']})
+
+    samples = scrape(client)
+    sent = sample(samples, 'http_response_bytes_total', method='GET', route='/api/recipes')
+    assert sent == len(full.get_data()) + len(compressed.get_data())
+
+
+def test_server_errors_are_counted(app, tmp_path):
+    (tmp_path / 'processed_ingredients.compact.json').write_text('{not json', encoding='utf-8')
+
+    def fail():
+        raise RuntimeError('boom')
+    app.add_url_rule('/fail', 'fail', fail)
+
+    client = app.test_client()
+    assert client.get('/api/recipes?format=compact').status_code == 500
+    assert client.get('/fail').status_code == 500
+
+    samples = scrape(client)
+    assert sample(samples, 'http_requests_total', method='GET', route='/api/recipes', status='500') == 1
+    assert sample(samples, 'http_requests_total', method='GET', route='/fail', status='500') == 1
+    assert sample(samples, 'http_request_duration_seconds_count', method='GET', route='/fail') == 1
@@ -0,0 +1,51 @@
+import json
+
+from app import create_app
+from conftest import write_processed
+from mmap_index import IndexSnapshot
+
+
+def add_ingredient(data_dir) -> None:
+    """Rewrite the processed JSON with one more ingredient, leaving the index as it was"""
+    path = data_dir / 'processed_ingredients.json'
+    processed = json.loads(path.read_text(encoding='utf-8'))
+    processed['ingredients']['saffron'] = {
+        'count': 1, 'recipes': [{'title': 'Paella', 'category': 'spanish'}], 'categories': ['spanish']}
+    path.write_text(json.dumps(processed), encoding='utf-8')
+
+
+def test_index_built_from_the_json_is_used(tmp_path):
+    write_processed(tmp_path)
+    files = create_app(str(tmp_path)).extensions['data_files']
+    assert isinstance(files.ingredient_index(), IndexSnapshot)
+
+
+def test_json_is_indexed_when_it_changed_after_the_index(tmp_path):
+    write_processed(tmp_path)
+    client = create_app(str(tmp_path)).test_client()
+    assert client.get('/api/ingredients/saffron').status_code == 404
+
+    add_ingredient(tmp_path)
+    response = client.get('/api/ingredients/saffron')
+    assert response.status_code == 200
+    assert response.get_json()['categories'] == ['spanish']
+
+
+def test_without_auto_reload_the_json_is_compared_on_preload(tmp_path):
+    write_processed(tmp_path)
+    app = create_app(str(tmp_path), preload=True, auto_reload=False)
+    files = app.extensions['data_files']
+    add_ingredient(tmp_path)
+    assert isinstance(files.ingredient_index(), IndexSnapshot)
+
+    files.preload()
+    assert not isinstance(files.ingredient_index(), IndexSnapshot)
+    assert app.test_client().get('/api/ingredients/saffron').status_code == 200
+
+
+def test_index_in_an_older_format_is_ignored(tmp_path):
+    write_processed(tmp_path)
+    index_path = tmp_path / 'ingredients.idx'
+    index_path.write_bytes(b'WFIDX002' + index_path.read_bytes()[8:])
+    client = create_app(str(tmp_path)).test_client()
+    assert client.get('/api/ingredients/butter').status_code == 200
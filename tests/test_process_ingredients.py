@@ -0,0 +1,59 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import nltk
+import pytest
+
+import process_ingredients
+from conftest import RECIPES
+from process_ingredients import IngredientProcessor
+from setup_nltk import TABLES_FILE
+
+OUTPUTS = ['processed_ingredients.json', 'processed_ingredients.compact.json',
+           'cooccurrence.json', 'recipe_graph.json']
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Enough recipes for several shards, with NLTK replaced by whitespace
+    tokenizing and precompiled tables so no NLTK data is needed
+    """
+    words = set()
+    for copy in range(12):
+        for i, recipe in enumerate(RECIPES):
+            recipe = {**recipe, 'title': f"{recipe['title']} {copy}", 'url': f"{recipe['url']}-{copy}"}
+            with open(tmp_path / f"{recipe['category']}_{copy}_{i}.json", 'w', encoding='utf-8') as f:
+                json.dump(recipe, f)
+            for line in recipe['ingredients']:
+                words.update(line.lower().split())
+    tables = {'nltk': nltk.__version__, 'stopwords': ['of', 'the'],
+              'lemmas': {word: word[:-1] if word.endswith('s') else word for word in words}}
+    (tmp_path / TABLES_FILE).write_text(json.dumps(tables), encoding='utf-8')
+
+    monkeypatch.setattr(IngredientProcessor, 'tokenize', lambda self, text: text.split())
+    monkeypatch.setattr(process_ingredients, 'SHARD_SIZE', 5)
+    # Forked workers inherit the stub tokenizer
+    monkeypatch.setattr(process_ingredients, 'ProcessPoolExecutor',
+                        partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('fork')))
+    return tmp_path
+
+
+def run(data_dir, workers: int) -> dict:
+    processor = IngredientProcessor(str(data_dir))
+    processor.process_ingredients(workers=workers, recipes=processor.iter_recipes())
+    processor.save_processed_data()
+    # Sharded runs report each worker's parser caches
+    assert bool(processor.worker_cache_stats) == (workers > 1)
+    return {name: (data_dir / name).read_bytes() for name in OUTPUTS}
+
+
+def test_sharded_run_matches_serial_run(data_dir):
+    serial = run(data_dir, workers=1)
+    assert run(data_dir, workers=3) == serial
+
+    processed = json.loads(serial['processed_ingredients.json'])
+    assert processed['stats']['total_recipes'] == 12 * len(RECIPES)
+    assert processed['ingredients']['egg']['count'] == 12 * 3
@@ -0,0 +1,86 @@
+import argparse
+import json
+from pathlib import Path
+
+import pytest
+
+import process_recipes
+from conftest import RECIPES
+from instrumentation import StageTimer
+from recipe_store import RecipeStore
+
+OUTPUTS = ['processed_ingredients.json', 'processed_ingredients.compact.json',
+           'cooccurrence.json', 'recipe_graph.json']
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A working directory whose data/ holds RECIPES as legacy per-recipe files"""
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / 'data'
+    data.mkdir()
+    for i, recipe in enumerate(RECIPES):
+        write_recipe(data / f"{recipe['category']}_{i}.json", recipe)
+    return tmp_path
+
+
+def write_recipe(path: Path, recipe: dict) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(recipe, f)
+
+
+def run(incremental: bool) -> dict:
+    args = argparse.Namespace(incremental=incremental, canonicalize=False, profile=False)
+    process_recipes.run(args, 'data/processed_ingredients.json', StageTimer())
+    return {name: Path('data', name).read_bytes() for name in OUTPUTS}
+
+
+def test_incremental_run_matches_full_run(workdir):
+    run(incremental=True)
+    # Change the first recipe, so its stored contribution is replaced
+    write_recipe(workdir / 'data' / 'breakfast_0.json', {**RECIPES[0], 'ingredients': ['2 eggs', 'sugar']})
+    (workdir / 'data' / 'desserts_3.json').unlink()
+    RecipeStore('data').append('asian_1', {'title': 'Fried rice', 'ingredients': ['rice', '2 eggs']})
+
+    incremental = run(incremental=True)
+    assert incremental == run(incremental=False)
+
+    recipes = json.loads(incremental['processed_ingredients.json'])['ingredients']['eggs']['recipes']
+    assert [recipe['title'] for recipe in recipes] == ['Fried rice', 'Omelette', 'Pad thai', 'Pancakes']
+
+
+def test_incremental_state_persists_contributions_only(workdir):
+    run(incremental=True)
+    with open(workdir / 'data' / 'recipes_state.json', encoding='utf-8') as f:
+        state = json.load(f)
+    assert 'aggregates' not in state
+    assert len(state['contributions']) == len(RECIPES)
+
+
+def test_duplicate_legacy_files_are_counted_once(workdir):
+    data = workdir / 'data'
+    pancakes = RECIPES[0]
+    # Two copies of a legacy file, plus the same recipe already migrated into the store
+    write_recipe(data / 'breakfast_0_copy.json', pancakes)
+    RecipeStore('data').append('breakfast_pancakes', pancakes)
+
+    def pancake_recipes(outputs):
+        processed = json.loads(outputs['processed_ingredients.json'])
+        return [recipe for recipe in processed['ingredients']['eggs']['recipes'] if recipe['title'] == 'Pancakes']
+
+    incremental = run(incremental=True)
+    full = run(incremental=False)
+    assert incremental == full
+    assert len(pancake_recipes(full)) == 1
+
+    # A legacy file stops being a duplicate once the recipe it duplicated is gone
+    other = {**RECIPES[1], 'url': 'https://example.com/omelette-2'}
+    write_recipe(data / 'breakfast_x.json', other)
+    write_recipe(data / 'breakfast_y.json', other)
+    run(incremental=True)
+    (data / 'breakfast_x.json').unlink()
+    incremental = run(incremental=True)
+    assert incremental == run(incremental=False)
+    omelettes = [recipe for recipe in json.loads(incremental['processed_ingredients.json'])['ingredients']['salt']['recipes']
+                 if recipe['title'] == 'Omelette']
+    assert len(omelettes) == 2
@@ -0,0 +1,64 @@
+import json
+
+from http_cache import ResponseCache, fixture_url
+from recipe_scraper import replay
+from scrape_engine import Page, ScrapePipeline
+
+
+def recipe_html(title: str) -> str:
+    recipe = {'@context': 'https://schema.org', '@type': 'Recipe', 'name': title,
+              'totalTime': 'PT20M', 'image': 'https://example.com/dish.jpg',
+              'recipeIngredient': ['2 eggs', 'butter'], 'recipeInstructions': 'Cook.'}
+    return f'<html><head><script type="application/ld+json">{json.dumps(recipe)}</script></head></html>'
+
+
+def shout(html: str, url: str) -> dict:
+    """Stand-in parser; module-level so parse workers can run it"""
+    if 'fail' in html:
+        raise ValueError(url)
+    return {'title': html.upper()}
+
+
+def test_fixture_url():
+    assert fixture_url('https%3A%2F%2Fexample.com%2Fpancakes') == 'https://example.com/pancakes'
+    assert fixture_url('example.com%2Fpancakes') == 'https://example.com/pancakes'
+
+
+def test_replay_over_bare_html_fixtures(tmp_path):
+    (tmp_path / 'https%3A%2F%2Fwww.bbcgoodfood.com%2Frecipes%2Fpancakes.html').write_text(recipe_html('Pancakes'))
+    # A sidecar names the URL of a fixture whose file name doesn't
+    (tmp_path / 'omelette.html').write_text(recipe_html('Omelette'))
+    (tmp_path / 'omelette.json').write_text(json.dumps({'url': 'https://www.bbcgoodfood.com/recipes/omelette'}))
+    # Sites recipe-scrapers doesn't support fail without stopping the replay
+    (tmp_path / 'example.com%2Fstew.html').write_text(recipe_html('Stew'))
+
+    assert replay(str(tmp_path), parse_workers=1) == {'parsed': 2, 'failed': 1}
+
+
+def test_replay_refreshes_cache_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    url = 'https://www.bbcgoodfood.com/recipes/shortbread'
+    cache.put(url, recipe_html('Shortbread'), None, None, {'title': 'stale'})
+
+    assert replay(str(tmp_path), parse_workers=1) == {'parsed': 1, 'failed': 0}
+    assert cache.get(url)['parsed']['title'] == 'Shortbread'
+
+
+def test_pipeline_parses_fetched_pages_and_reports_errors():
+    def fetch(url):
+        if url == 'missing':
+            raise IOError(url)
+        if url == 'known':
+            return Page(url, None, parsed={'title': 'cached'})
+        return Page(url, url)
+
+    urls = ['a', 'known', 'b', 'missing', 'fail', 'c']
+    results = {url: (fields, error) for url, _, fields, error in
+               ScrapePipeline(fetch, shout, fetchers=2, parse_workers=2, queue_size=2).run(urls)}
+
+    assert set(results) == set(urls)
+    assert {url: results[url][0] for url in ('a', 'b', 'c', 'known')} == {
+        'a': {'title': 'A'}, 'b': {'title': 'B'}, 'c': {'title': 'C'}, 'known': {'title': 'cached'}}
+    assert isinstance(results['missing'][1], IOError)
+    assert isinstance(results['fail'][1], ValueError)
+    assert results['fail'][0] is None
@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from recipe_scraper import RecipeScraper
+from scrape_engine import FetchEngine
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Local server for fixture pages.
+
+    `responses` maps a path to the (status, headers) answers given in turn,
+    the last one repeating; other paths return a 200 page. Each request is
+    held for `delay` seconds, and hits, arrival times and the peak number
+    of requests in flight are recorded.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FixtureHandler)
+        self.responses = {}
+        self.delay = 0.0
+        self.hits = Counter()
+        self.arrivals = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def url(self, path: str, host: str = '127.0.0.1') -> str:
+        return f'http://{host}:{self.server_address[1]}{path}'
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            answers = server.responses.get(self.path, [(200, {})])
+            status, headers = answers[min(server.hits[self.path], len(answers) - 1)]
+            server.hits[self.path] += 1
+            server.arrivals.append(time.monotonic())
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            body = f'<html><h1>{self.path}</h1></html>'.encode('utf-8')
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FixtureServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def engine(**options) -> FetchEngine:
+    session = requests.Session()
+    session.trust_env = False  # Never send fixture requests through a proxy
+    options = {'per_host_rate': 1000.0, 'backoff': 0.01, **options}
+    return FetchEngine(session=session, **options)
+
+
+def test_fetch_returns_page(server):
+    response = engine().fetch(server.url('/recipe'))
+    assert response.status_code == 200
+    assert '<h1>/recipe</h1>' in response.text
+
+
+def test_per_host_concurrency_is_limited(server):
+    server.delay = 0.1
+    fetcher = engine(concurrency=8, per_host_concurrency=2)
+    urls = [server.url(f'/recipe/{i}') for i in range(8)]
+    assert [response.status_code for response in fetcher.map(fetcher.fetch, urls)] == [200] * 8
+    assert server.peak_in_flight == 2
+
+
+def test_global_concurrency_is_limited(server):
+    server.delay = 0.1
+    fetcher = engine(concurrency=3, per_host_concurrency=2)
+    # Two host names for the same server, so each gets its own per-host limit
+    urls = [server.url(f'/recipe/{i}', host) for i in range(4) for host in ('127.0.0.1', 'localhost')]
+    list(fetcher.map(fetcher.fetch, urls))
+    assert server.peak_in_flight == 3
+    assert fetcher.stats['requests'] == 8
+
+
+def test_requests_to_a_host_are_paced(server):
+    fetcher = engine(concurrency=4, per_host_concurrency=4, per_host_rate=20.0)
+    list(fetcher.map(fetcher.fetch, [server.url(f'/recipe/{i}') for i in range(6)]))
+    arrivals = sorted(server.arrivals)
+    # One request may go straight away; the other five wait 1/20 s each
+    assert arrivals[-1] - arrivals[0] >= 5 / 20 * 0.9
+
+
+def test_retry_after_is_honoured(server):
+    server.responses['/busy'] = [(429, {'Retry-After': '1'}), (200, {})]
+    fetcher = engine()
+    start = time.monotonic()
+    assert fetcher.fetch(server.url('/busy')).status_code == 200
+    assert time.monotonic() - start >= 1
+    assert server.hits['/busy'] == 2
+    assert fetcher.stats['retries'] == 1
+
+
+def test_unavailable_is_retried_with_backoff(server):
+    server.responses['/flaky'] = [(503, {}), (503, {}), (200, {})]
+    fetcher = engine(retries=3)
+    assert fetcher.fetch(server.url('/flaky')).status_code == 200
+    assert server.hits['/flaky'] == 3
+    assert fetcher.stats['retries'] == 2
+
+
+def test_retries_are_bounded(server):
+    server.responses['/down'] = [(503, {'Retry-After': '0'})]
+    fetcher = engine(retries=2)
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch(server.url('/down'))
+    assert server.hits['/down'] == 3
+    assert fetcher.stats['retries'] == 2
+
+
+def test_retry_after_beyond_max_backoff_fails_the_url(server):
+    server.responses['/later'] = [(429, {'Retry-After': '3600'}), (200, {})]
+    fetcher = engine(max_backoff=1.0)
+    start = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch(server.url('/later'))
+    assert time.monotonic() - start < 1
+    assert server.hits['/later'] == 1
+    assert fetcher.stats['retries'] == 0
+    assert fetcher.stats['retry_after_exceeded'] == 1
+
+
+def test_backoff_is_capped(server):
+    fetcher = engine(backoff=10.0, max_backoff=0.5)
+    assert all(fetcher._retry_delay(attempt) <= 0.5 for attempt in range(5))
+
+
+def test_identical_body_without_validators_is_not_reparsed(server, tmp_path):
+    session = requests.Session()
+    session.trust_env = False
+    scraper = RecipeScraper(output_dir=str(tmp_path), per_host_rate=1000.0, session=session)
+    url = server.url('/recipe')
+
+    page = scraper.fetch_page(url)
+    assert page.html is not None
+    scraper.cache.put(url, page.html, None, None, {'title': 'Pancakes'})
+    again = scraper.fetch_page(url)
+    assert again.html is None
+    assert again.parsed == {'title': 'Pancakes'}
+
+    # A changed body is parsed again
+    scraper.cache.put(url, '<html>older</html>', None, None, {'title': 'Pancakes'})
+    assert scraper.fetch_page(url).html == page.html
@@ -0,0 +1,54 @@
+import json
+
+import nltk
+import pytest
+
+import setup_nltk
+from setup_nltk import TABLES_FILE, TOKENIZER_RESOURCE, ensure_resources, load_tables
+
+
+def write_tables(data_dir, version: str) -> None:
+    with open(data_dir / TABLES_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'nltk': version, 'stopwords': ['a'], 'lemmas': {'eggs': 'egg'}}, f)
+
+
+def test_tables_from_this_nltk_release_are_loaded(tmp_path):
+    write_tables(tmp_path, nltk.__version__)
+    assert load_tables(str(tmp_path))['lemmas'] == {'eggs': 'egg'}
+
+
+def test_tables_from_another_nltk_release_are_ignored(tmp_path):
+    write_tables(tmp_path, '0.0.1')
+    assert load_tables(str(tmp_path)) is None
+
+
+def test_missing_tables(tmp_path):
+    assert load_tables(str(tmp_path)) is None
+
+
+def test_tokenizer_resource_is_the_one_word_tokenize_loads(monkeypatch):
+    from nltk.tokenize import word_tokenize
+    looked_up = []
+
+    def find(path, *args, **kwargs):
+        looked_up.append(path)
+        raise LookupError(path)
+
+    monkeypatch.setattr(nltk.data, 'find', find)
+    with pytest.raises(LookupError):
+        word_tokenize('2 eggs')
+    assert looked_up[0].startswith(setup_nltk.RESOURCES[TOKENIZER_RESOURCE] + '/')
+
+
+def test_installed_tokenizer_is_not_downloaded(monkeypatch):
+    downloaded = []
+
+    def find(path):
+        if path != setup_nltk.RESOURCES[TOKENIZER_RESOURCE]:
+            raise LookupError(path)
+
+    monkeypatch.setattr(setup_nltk, '_available', set())
+    monkeypatch.setattr(nltk.data, 'find', find)
+    monkeypatch.setattr(nltk, 'download', lambda resource, **kwargs: downloaded.append(resource) or False)
+    ensure_resources(TOKENIZER_RESOURCE)
+    assert downloaded == []
@@ -0,0 +1,48 @@
+import json
+import os
+
+from build_static import is_stale
+from ingredient_index import IngredientIndex
+from static_shards import ShardWriter, build_shards, category_pages
+
+INGREDIENTS = {
+    'butter': {'count': 3, 'recipes': [], 'categories': ['dairy', 'baking']},
+    'flour': {'count': 2, 'recipes': [], 'categories': ['baking']},
+    'salt': {'count': 1, 'recipes': [], 'categories': []}
+}
+
+
+def test_ingredients_are_paged_under_every_category():
+    index = IngredientIndex({'ingredients': INGREDIENTS})
+    pages = category_pages(INGREDIENTS, index.by_count)
+    assert pages == {
+        'baking': [['butter', 'flour']],
+        'dairy': [['butter']],
+        'uncategorized': [['salt']]
+    }
+    # Every category page lists what the API lists for that category
+    for category in ('baking', 'dairy'):
+        assert pages[category] == [list(index.by_category[category])]
+
+
+def test_names_shard_points_at_a_page_holding_the_record(tmp_path):
+    index = IngredientIndex({'ingredients': INGREDIENTS})
+    writer = ShardWriter(tmp_path)
+    manifest = build_shards({'ingredients': INGREDIENTS}, index.by_count, {}, {}, writer)
+    names = writer.shard_dir / os.path.basename(manifest['shards']['names'])
+    shard = json.loads(names.read_text(encoding='utf-8'))
+    for name, page in zip(shard['names'], shard['pages']):
+        page_file = tmp_path / manifest['pages'][page]['file']
+        assert name in json.loads(page_file.read_text(encoding='utf-8'))['ingredients']
+
+
+def test_derived_files_older_than_the_data_are_stale(tmp_path):
+    source, derived = tmp_path / 'processed_ingredients.json', tmp_path / 'cooccurrence.json'
+    source.write_text('{}')
+    # Missing
+    assert is_stale(derived, source)
+    derived.write_text('{}')
+    os.utime(source, ns=(0, derived.stat().st_mtime_ns + 1))
+    assert is_stale(derived, source)
+    os.utime(source, ns=(0, derived.stat().st_mtime_ns - 1))
+    assert not is_stale(derived, source)
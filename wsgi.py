@@ -0,0 +1,13 @@
+"""
+Production WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+The data is loaded and indexed at import, in the server's master process
+when it preloads the app, so forked workers share it copy-on-write.
+Workers don't check the data files for changes; the master reloads them
+on SIGHUP and forks fresh workers (see gunicorn.conf.py).
+"""
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get('DATA_DIR'), preload=True, auto_reload=False)